@@ -1,331 +1,30 @@
 import streamlit as st
 import pandas as pd
-import itertools
+import json
 import statistics
-from collections import namedtuple
 
-# ==========================================
-# 1. Configuration & Constants
-# ==========================================
-
-# Talent Tree Definitions
-TALENT_TREES_DEF = {
-    "Cavalry": {5: 15.0},
-    "Pvp": {10: 10.0, 21: 20.0},
-    "Tank": {10: 10.0, 21: 20.0},
-    "Mobility": {5: 10.0, 15: 20.0, 26: 25.0},
-    "Overall": {10: 10.0},
-    "Peacekeeping": {10: 10.0},
-    "Control": {5: 10.0},
-    "Support": {},
-    "Skills": {}
-}
-MAX_TALENT_POINTS = 49
-INNATE_SPEED_BONUS = 6.0
-
-# Big Talents (Keystone) - Main Hero Only
-BIG_TALENT_EFFECTS = {
-    "Balanced Heart": 5.0,
-    "Mighty Power": 0.0,
-    "Shield of Stability": -2.0,
-    "Backstabber": 0.0,
-    "Transforming Spirit": 0.0
-}
-
-HERO_DATABASE = [
-    {
-        "Name": "Neya",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp", "Mobility"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Balanced Heart"
-    },
-    {
-        "Name": "Lieh-Shan Yen",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry"],
-        "Skill_Speeds": [0.0] * 5,
-        "Big_Talent": "Mighty Power"
-    },
-    {
-        "Name": "Urag",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Mighty Power"
-    },
-    {
-        "Name": "Emrys",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp", "Mobility"],
-        "Skill_Speeds": [3.0, 4.5, 6.0, 8.0, 10.0],
-        "Big_Talent": "Balanced Heart"
-    },
-    {
-        "Name": "Forondil",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp", "Control"],
-        "Skill_Speeds": [10.0, 12.0, 14.0, 16.0, 20.0],
-        "Special_Rule": "Main_Only",
-        "Big_Talent": "Balanced Heart"
-    },
-    {
-        "Name": "Tobin",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Tank"],
-        "Skill_Speeds": [0.0] * 5,
-        "Big_Talent": "Shield of Stability"
-    },
-    {
-        "Name": "Bakshi",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Peacekeeping"],
-        "Skill_Speeds": [0.0] * 5,
-        "Big_Talent": "Mighty Power"
-    },
-    {
-        "Name": "Theodore",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Mighty Power"
-    },
-    {
-        "Name": "Mardok",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp", "Mobility"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Balanced Heart"
-    },
-    {
-        "Name": "Freya",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Control"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Backstabber"
-    },
-    {
-        "Name": "Agnar",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Pvp"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Mighty Power"
-    },
-    {
-        "Name": "Mu Hsiang",
-        "Type": "Cavalry",
-        "Trees": ["Overall", "Pvp", "Support"],
-        "Skill_Speeds": [0.0] * 5,
-        "Big_Talent": "Transforming Spirit"
-    },
-    {
-        "Name": "Theia",
-        "Type": "Cavalry", # Conditional Flying
-        "Trees": ["Overall", "Pvp", "Support"],
-        "Skill_Speeds": [0.0] * 5, # Special rule handling needed
-        "Big_Talent": "Transforming Spirit", # Guessing? User didn't specify. Assuming neutral like others or user can correct.
-        # Wait, user didn't specify big talent for Theia/Seluna. I'll default to "Mighty Power" (0) or similar to be safe.
-        # Actually user said "Mu Hsiang has a new big talent...". 
-        # I will assume "Mighty Power" (0 impact) for Theia/Seluna unless told otherwise.
-        "Special_Rule": "Theia_Flying" 
-    },
-    {
-        "Name": "Seluna",
-        "Type": "Cavalry",
-        "Trees": ["Overall", "Pvp", "Skills"],
-        "Skill_Speeds": [8.0, 10.0, 12.0, 16.0, 20.0],
-        "Big_Talent": "Mighty Power" # Default
-    },
-    {
-        "Name": "Falgrim",
-        "Type": "Cavalry",
-        "Trees": ["Pvp"],
-        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
-        "Big_Talent": "Mighty Power" # Default
-    },
-    {
-        "Name": "Alistair",
-        "Type": "Cavalry",
-        "Trees": ["Cavalry", "Tank"],
-        "Skill_Speeds": [0.0] * 5,
-        "Big_Talent": "Mighty Power" # Default
-    }
-]
-
-# Synergy Definitions (Bidirectional or Directional)
-# Format: "HeroName": {"PartnerName": "Type"}
-# Types: "Synergy" (Green), "Anti-Synergy" (Red)
-HERO_SYNERGIES = {
-    # Placeholders - User to provide
-}
-
-MarchSetup = namedtuple('MarchSetup', ['main', 'deputy', 'total_speed', 'talent_config', 'synergy_match', 'skill_breakdown', 'specific_synergy'])
-
-# ==========================================
-# 2. Logic
-# ==========================================
-
-@st.cache_data
-def get_achievable_talent_speeds(hero_name):
-    hero = next((h for h in HERO_DATABASE if h["Name"] == hero_name), None)
-    if not hero:
-        return {}
-    
-    available_branches = []
-    
-    for tree_name in hero["Trees"]:
-        if tree_name in TALENT_TREES_DEF:
-            branch_options = [(0, 0.0, "None")] 
-            
-            milestones = TALENT_TREES_DEF[tree_name]
-            for cost, speed in milestones.items():
-                branch_options.append((cost, speed, f"{tree_name}({int(speed)}%)"))
-            
-            available_branches.append(branch_options)
-            
-    valid_configs = {}
-    
-    for combination in itertools.product(*available_branches):
-        total_cost = sum(c[0] for c in combination)
-        total_speed_talents = sum(c[1] for c in combination)
-        description_parts = [c[2] for c in combination if c[2] != "None"]
-        
-        if total_cost <= MAX_TALENT_POINTS:
-            desc_a = ", ".join(description_parts) if description_parts else "No Talents"
-            if total_speed_talents not in valid_configs or valid_configs[total_speed_talents][1] > total_cost:
-                valid_configs[total_speed_talents] = (desc_a, total_cost)
-            
-            speed_b = total_speed_talents + INNATE_SPEED_BONUS
-            desc_b = (desc_a + " + Innate(6%)") if desc_a != "No Talents" else "Innate(6%)"
-            if speed_b not in valid_configs or valid_configs[speed_b][1] > total_cost:
-                valid_configs[speed_b] = (desc_b, total_cost)
-                
-    return valid_configs
-
-def get_skill_speed(hero_name, level, is_main, is_theia_flying=False):
-    if hero_name.startswith("Generic"):
-        return 0.0
-        
-    hero = next(h for h in HERO_DATABASE if h["Name"] == hero_name)
-    
-    if hero.get("Special_Rule") == "Main_Only" and not is_main:
-        return 0.0
-        
-    if hero.get("Special_Rule") == "Theia_Flying":
-        if is_theia_flying:
-            # Special array for Theia Flying
-            s_list = [10.0, 12.0, 14.0, 16.0, 20.0]
-            # Use logic below to pick level
-        else:
-            return 0.0
-    else:
-        s_list = hero.get("Skill_Speeds", [0]*5)
-        
-    if level < 1: 
-        return 0.0
-    
-    idx = max(0, min(level - 1, 4))
-    return s_list[idx]
-
-def solve_for_march(main, deputy, user_skill_inputs_levels, target_speed=50.0, neya_artifact_bonus=0.0, is_theia_flying=False):
-    if main.startswith("Generic"):
-        m_data = {"Name": main, "Type": "Cavalry", "Big_Talent": "None"} # Dummy
-    else:
-        m_data = next(h for h in HERO_DATABASE if h["Name"] == main)
-    
-    # Deputy data fetch not strictly needed for speed calc, but needed for type check if we wanted detailed synergy
-    d_type = "Cavalry"
-    if not deputy.startswith("Generic"):
-        d_type = next(h["Type"] for h in HERO_DATABASE if h["Name"] == deputy)
-
-    m_lvl = user_skill_inputs_levels.get(main, 1)
-    d_lvl = user_skill_inputs_levels.get(deputy, 1)
-    
-    # 1. Skills
-    m_skill = get_skill_speed(main, m_lvl, is_main=True, is_theia_flying=is_theia_flying)
-    d_skill = get_skill_speed(deputy, d_lvl, is_main=False, is_theia_flying=is_theia_flying)
-    
-    # 2. Big Talent (Main Only)
-    big_talent_name = m_data.get("Big_Talent", "Mighty Power") 
-    big_talent_val = BIG_TALENT_EFFECTS.get(big_talent_name, 0.0)
-    
-    # 3. Artifacts
-    artifact_bonus = 0.0
-    if neya_artifact_bonus > 0 and ("Neya" in [main, deputy]):
-        artifact_bonus = neya_artifact_bonus
-    
-    fixed_speed = m_skill + d_skill + big_talent_val + artifact_bonus
-    
-    # 4. Optimized Tree Search
-    possible_talents = {}
-    if not main.startswith("Generic"):
-        gap = target_speed - fixed_speed
-        possible_talents = get_achievable_talent_speeds(main)
-    
-    if not possible_talents:
-        # Fallback if generic or error
-        # Generics have 0 talents
-        best_speed, tal_desc = 0.0, "None"
-    else:
-        # Find closest
-        gap = target_speed - fixed_speed
-        best_speed = min(possible_talents.keys(), key=lambda x: abs(x - gap))
-        tal_desc, _ = possible_talents[best_speed]
-    
-    final_speed = fixed_speed + best_speed
-    
-    # Logic: Generic is assumed Cavalry for synergy purposes (or whatever user prefers)
-    # User said "favor real heroes".
-    # We will assume Generic matches type to avoid synergy penalty noise, since they are fillers.
-    is_synergy = (m_data.get("Type", "Cavalry") == d_type)
-    
-    skill_breakdown = f"Main({m_skill}) + Dep({d_skill}) + {big_talent_name}({big_talent_val})"
-    if artifact_bonus > 0:
-        skill_breakdown += f" + Lunaris({artifact_bonus})"
-        
-    # Synergy Check
-    syn_type = HERO_SYNERGIES.get(main, {}).get(deputy)
-    if not syn_type:
-        syn_type = HERO_SYNERGIES.get(deputy, {}).get(main) # Bidirectional check
-    
-    return MarchSetup(
-        main=main,
-        deputy=deputy,
-        total_speed=final_speed,
-        talent_config=tal_desc,
-        synergy_match=is_synergy,
-        skill_breakdown=skill_breakdown,
-        specific_synergy=syn_type
-    )
-
-def all_pairs_generator(items, forced_mains=None):
-    if forced_mains is None:
-        forced_mains = set()
-
-    if len(items) < 2:
-        yield []
-        return
-
-    first = items[0]
-    rest = items[1:]
-    
-    for i, partner in enumerate(rest):
-        pair = (first, partner)
-        remaining = rest[:i] + rest[i+1:]
-        
-        # Check: Is partner allowed to be deputy? (i.e. not in forced_mains)
-        if partner not in forced_mains:
-            for solution in all_pairs_generator(remaining, forced_mains):
-                yield [pair] + solution
-            
-        # Check: Is first allowed to be deputy?
-        if first not in forced_mains:
-            pair_flipped = (partner, first)
-            for solution in all_pairs_generator(remaining, forced_mains):
-                yield [pair_flipped] + solution
+from syncer import (
+    HERO_DATABASE,
+    LUNARIS_SPEED_BY_LEVEL,
+    MAX_TALENT_POINTS,
+    TALENT_TREES_DEF,
+    SOLVER_ANYTIME,
+    SOLVER_BRANCH_AND_BOUND,
+    SOLVER_ENUMERATE,
+    SOLVER_EXACT,
+    SOLVER_LOCAL_SEARCH,
+    SOLVER_PARETO,
+    ConstraintError,
+    OptimizeOptions,
+    OptimizerState,
+    plan_synergy,
+)
+from syncer.background import SolveJob, UpgradeJob, search_key
+from syncer.cache import ResultCache
+from syncer.sweep import SWEEP_START, SWEEP_STEP, SWEEP_STOP, sweep_targets, target_grid
 
 # ==========================================
-# 3. UI
+# UI
 # ==========================================
 
 st.set_page_config(page_title="CoD Speed Syncer 3.1", layout="wide")
@@ -341,20 +40,43 @@ select_all = st.sidebar.checkbox("Select All Heroes")
 default_sel = all_names if select_all else []
 selected_names = st.sidebar.multiselect("Select Heroes", all_names, default=default_sel, key=f"hero_sel_{select_all}")
 num_fillers = st.sidebar.number_input("Add Generic Deputies / Temu Cav Deputies", min_value=0, max_value=10, value=0, help="Use these to fill empty slots in your marches. Can be archer heroes like Nico, or inf like Mogro")
+SOLVER_MODES = {
+    "Top 20 (branch & bound)": SOLVER_BRANCH_AND_BOUND,
+    "Top 20 (enumerate)": SOLVER_ENUMERATE,
+    "Exact optimum": SOLVER_EXACT,
+    "Top 20 (anytime)": SOLVER_ANYTIME,
+    "Large roster (local search)": SOLVER_LOCAL_SEARCH,
+    "Trade-offs (deviation vs synergy)": SOLVER_PARETO,
+}
+solver_mode = st.sidebar.radio("Solver", list(SOLVER_MODES), help="Exact optimum proves the single best assignment for any roster size. Top 20 lists alternatives but stops after 100,000 combinations; branch & bound skips combinations that can't make the list. Anytime shows a quick answer first and keeps improving it until the time budget runs out. Large roster lists alternatives for big pooled rosters: the first option is the exact optimum, the rest come from a local search around it. Trade-offs lists every plan where more synergy costs more deviation, from the closest sync to the most synergy.")
+time_budget = None
+if SOLVER_MODES[solver_mode] in (SOLVER_ANYTIME, SOLVER_LOCAL_SEARCH):
+    time_budget = st.sidebar.number_input("Time Budget (s)", min_value=0.1, max_value=30.0, value=0.5, step=0.1)
+min_distance = 0
+if SOLVER_MODES[solver_mode] not in (SOLVER_EXACT, SOLVER_PARETO):
+    min_distance = st.sidebar.number_input("Min. Different Marches", min_value=0, max_value=10, value=0, help="Every listed option differs from the others in at least this many marches, so the options aren't near-copies; there may be fewer than 20, and only the first is guaranteed to be the best. Swapping two deputies changes 2 marches, swapping main and deputy 1. 0 lists the 20 best as they come.")
 
 # Artifact Config
 neya_artifact_bonus = 0.0
 if "Neya" in selected_names:
     use_lunaris = st.sidebar.checkbox("Lunaris Artifact", value=False, help="Lunaris only gives move speed when paired with Neya and might not be ideal because it only out of combat.")
     if use_lunaris:
-        lunaris_level = st.sidebar.select_slider("Lunaris Level", options=[1, 2, 3, 4, 5], value=5)
-        # Map level to speed: 1=20, 2=25, 3=30, 4=35, 5=40
-        neya_artifact_bonus = 15.0 + (lunaris_level * 5.0)
+        lunaris_level = st.sidebar.select_slider("Lunaris Level", options=list(LUNARIS_SPEED_BY_LEVEL), value=5)
+        neya_artifact_bonus = LUNARIS_SPEED_BY_LEVEL[lunaris_level]
     
 is_theia_flying = False
 if "Theia" in selected_names:
     is_theia_flying = st.sidebar.checkbox("Theia uses Flying Cavs (Eagles)?", value=False, help="Enable if Theia is leading a Flying unit.")
 
+talent_reserve = {}
+with st.sidebar.expander("Talent Reserve"):
+    st.caption("Points every main with that tree must spend there whatever the speed, e.g. 21 in Pvp for combat talents. The rest of the 49 points still go to speed.")
+    for tree, milestones in TALENT_TREES_DEF.items():
+        if milestones:
+            points = st.number_input(tree, min_value=0, max_value=MAX_TALENT_POINTS, value=0, key=f"reserve_{tree}")
+            if points:
+                talent_reserve[tree] = points
+
 user_skill_levels = {}
 if selected_names:
     st.sidebar.markdown("---") 
@@ -364,6 +86,24 @@ if selected_names:
         with cols[i % 2]:
             user_skill_levels[name] = st.number_input(f"{name}", 0, 5, 5, key=f"lvl_{name}")
 
+# --- Debug: where the last search spent its time ---
+st.sidebar.markdown("---")
+if st.sidebar.checkbox("Show solver stats", value=False, help="Phase timings and search counters of the last search, for tracking down slow runs."):
+    search_stats = st.session_state.get("search_stats")
+    if not search_stats:
+        st.sidebar.caption("Run a search to collect stats.")
+    else:
+        st.sidebar.dataframe(pd.DataFrame({
+            "Phase": list(search_stats["phases"]),
+            "ms": [round(t * 1000, 2) for t in search_stats["phases"].values()],
+        }), hide_index=True)
+        st.sidebar.caption(f"Solver {search_stats['total_seconds'] * 1000:.1f} ms of {search_stats['wall_seconds'] * 1000:.1f} ms wall (talent indexes built at startup in {search_stats['talent_index_startup_seconds'] * 1000:.0f} ms)")
+        st.sidebar.dataframe(pd.DataFrame({
+            "Counter": ["Matchings generated", "Pruned", "Duplicates skipped", "Too close (diversity)", "Pair scores computed", "Pair scores re-targeted", "Pair scores reused", "Result cache hit"],
+            "Value": [str(search_stats[k]) for k in ("generated", "pruned", "duplicates", "too_close", "pair_scores_computed", "pair_scores_retargeted", "pair_scores_reused", "result_cache_hit")],
+        }), hide_index=True)
+        st.sidebar.download_button("Download stats (JSON)", json.dumps(search_stats, indent=2), file_name="solver_stats.json", mime="application/json")
+
 # --- Force Pairings ---
 forced_pairs = []
 forced_mains_only = set()
@@ -413,128 +153,192 @@ if 'optimization_results' not in st.session_state:
     st.session_state.optimization_results = []
 if 'result_index' not in st.session_state:
     st.session_state.result_index = 0
+if 'search_summary' not in st.session_state:
+    st.session_state.search_summary = ""
+if 'sweep_results' not in st.session_state:
+    st.session_state.sweep_results = None
+if 'solve_job' not in st.session_state:
+    st.session_state.solve_job = None
+if 'search_error' not in st.session_state:
+    st.session_state.search_error = None
+if 'search_stats' not in st.session_state:
+    st.session_state.search_stats = None
+if 'results_solver' not in st.session_state:
+    st.session_state.results_solver = None
+if 'upgrade_results' not in st.session_state:
+    st.session_state.upgrade_results = None
+if 'upgrade_job' not in st.session_state:
+    st.session_state.upgrade_job = None
+if 'upgrade_error' not in st.session_state:
+    st.session_state.upgrade_error = None
+if 'optimizer_state' not in st.session_state:
+    # Pair scores and last plans, so a small tweak only re-scores what changed
+    st.session_state.optimizer_state = OptimizerState()
 
 # --- Helper Logic ---
-def run_optimization():
-    # 1. Validate Forced Pairs
-    pinned_heroes = []
-    fixed_results = []
-    
-    # Check for duplicates across pins and constraints
-    all_pinned_flat = [h for pair in forced_pairs for h in pair]
-    # Check intersection with forced_mains
-    overlap = set(all_pinned_flat).intersection(forced_mains_only)
-    
-    if len(all_pinned_flat) != len(set(all_pinned_flat)) or overlap:
-        st.error("❌ Error: Duplicate heroes used in Forced Pairings/Constraints!")
+@st.cache_resource
+def result_cache():
+    # Shared by every session; repeat searches are answered from disk
+    return ResultCache()
+
+def current_options():
+    return OptimizeOptions(
+        neya_artifact_bonus=neya_artifact_bonus,
+        is_theia_flying=is_theia_flying,
+        num_fillers=num_fillers,
+        forced_pairs=forced_pairs,
+        forced_mains=forced_mains_only,
+        solver=SOLVER_MODES[solver_mode],
+        time_budget=time_budget,
+        min_distance=min_distance,
+        talent_reserve=talent_reserve,
+    )
+
+def start_search():
+    # Solves on a background thread; a search still running for older inputs is cancelled
+    job = st.session_state.solve_job
+    if job is not None and job.running:
+        job.cancel()
+    upgrade_job = st.session_state.upgrade_job
+    if upgrade_job is not None and upgrade_job.running:
+        upgrade_job.cancel()
+    st.session_state.upgrade_job = None
+    st.session_state.search_error = None
+    st.session_state.solve_job = SolveJob(selected_names, user_skill_levels, TARGET_SPEED, current_options(), result_cache(), st.session_state.optimizer_state)
+
+def finish_search(job):
+    st.session_state.solve_job = None
+    if job.error:
+        st.session_state.search_error = job.error
         return
-        
-    for m, d in forced_pairs:
-        pinned_heroes.extend([m, d])
-        res = solve_for_march(m, d, user_skill_levels, TARGET_SPEED, neya_artifact_bonus, is_theia_flying)
-        fixed_results.append(res)
-        
-    remaining_roster = [h for h in selected_names if h not in pinned_heroes]
     
-    # Add Generics to remaining roster
-    for i in range(num_fillers):
-        remaining_roster.append(f"Generic {i+1}")
-        
-    # Check if remainder is odd (one will be dropped)
-    potential_rosters = []
-    if len(remaining_roster) % 2 != 0:
-        # Optimization: Priority drop Generics first.
-        # If we have any generic, we create only 1 potential roster: the one where the last Generic is dropped.
-        generics_in_roster = [h for h in remaining_roster if h.startswith("Generic")]
-        
-        if generics_in_roster:
-            # Remove the last added generic
-            # Find index of last generic
-            bad_hero = generics_in_roster[-1]
-            idx = remaining_roster.index(bad_hero)
-            potential_rosters.append(remaining_roster[:idx] + remaining_roster[idx+1:])
-        else:
-            # No generics, standard round-robin drop
-            for i in range(len(remaining_roster)):
-                if remaining_roster[i] not in forced_mains_only:
-                    potential_rosters.append(remaining_roster[:i] + remaining_roster[i+1:])
+    result = job.result
+    # Wall time includes the thread hand-off and polling, the phases only the solver itself
+    st.session_state.search_stats = {**result.stats.to_dict(), "wall_seconds": job.elapsed}
+    if result.plans:
+        st.session_state.optimization_results = result.plans
+        st.session_state.result_index = 0
+        st.session_state.results_solver = job.options.solver
+        # Stale jobs are restarted, so the current inputs are the ones this result was searched with.
+        # One re-solve per hero: in the background like the search, the results show meanwhile.
+        st.session_state.upgrade_results = None
+        st.session_state.upgrade_error = None
+        st.session_state.upgrade_job = UpgradeJob(selected_names, user_skill_levels, TARGET_SPEED, job.options, st.session_state.optimizer_state)
+    
+    if job.options.solver == SOLVER_EXACT:
+        summary = "Proven optimal (min-cost matching)"
+    elif job.options.solver == SOLVER_PARETO:
+        summary = f"{len(result.plans)} trade-offs between deviation and synergy: checked {result.checked:,} combos"
+        if not result.proven_optimal:
+            summary += ", the front may be incomplete"
+    elif job.options.solver == SOLVER_LOCAL_SEARCH:
+        summary = f"Top score proven optimal (min-cost matching), alternatives from {result.checked:,} local optima"
+    elif result.proven_optimal and job.options.min_distance:
+        # The diversity filter keeps the first good plan of each neighbourhood, not the true top N
+        summary = f"Top score proven optimal, {len(result.plans)} options at least {job.options.min_distance} marches apart: checked {result.checked:,} combos"
+    elif result.proven_optimal:
+        summary = f"Proven optimal top {len(result.plans)}: checked {result.checked:,} combos"
     else:
-        potential_rosters = [remaining_roster]
-        
-    if not potential_rosters:
-        st.error("❌ Error: Constraints impossible to satisfy (e.g. forced Odd number of Main-Only heroes).")
+        summary = f"Checked {result.checked:,} combos"
+    if result.pruned:
+        summary += f", pruned {result.pruned:,} branches"
+    if result.hit_limit:
+        summary += " (stopped at the search limit)"
+    if result.timed_out and job.options.solver == SOLVER_ANYTIME:
+        # The anytime solver lists the matching solver's optimum before it starts searching
+        summary += " (stopped at the time budget: the top score is proven, the alternatives may not be)"
+    elif result.timed_out:
+        summary += " (stopped at the time budget)"
+    if result.cancelled:
+        summary += " (cancelled, results may be incomplete)"
+    if not result.plans:
+        summary += " - nothing found before the search stopped"
+    if result.cached:
+        summary += " (cached)"
+    st.session_state.search_summary = summary
+
+def show_search_status():
+    # Polled while the job runs; only this fragment reruns, the rest of the page stays usable
+    job = st.session_state.solve_job
+    if job is None:
         return
+    if not job.running:
+        finish_search(job)
+        st.rerun()
         
-    count_eval = 0
-    MAX_CHECKS = 100000 
-    
-    # Store tuples of (deviation_score, result_set)
-    all_valid_results = []
-    
-    status_text = st.empty()
-    progress_bar = st.progress(0)
-    
-    # Base deviation from fixed results
-    fixed_dev = 0
-    for res in fixed_results:
-        dev = abs(res.total_speed - TARGET_SPEED)
-        if dev > 1.5: fixed_dev += (dev * 10)
-        else: fixed_dev += dev
-    
-    if not remaining_roster and fixed_results:
-         # Edge case: All heroes are pinned, no optimization needed
-         all_valid_results.append((fixed_dev, fixed_results))
-    
-    for roster in potential_rosters:
-        for pair_list in all_pairs_generator(list(roster), forced_mains_only):
-            current_results = list(fixed_results) # Start with pinned
-            total_deviation = fixed_dev
-            
-            for main, deputy in pair_list:
-                res = solve_for_march(main, deputy, user_skill_levels, TARGET_SPEED, neya_artifact_bonus, is_theia_flying)
-                current_results.append(res)
-                
-                dev = abs(res.total_speed - TARGET_SPEED)
-                if dev > 1.5: 
-                        total_deviation += (dev * 10)
-                else:
-                    total_deviation += dev
-            
-            all_valid_results.append((total_deviation, current_results))
-            
-            # Pruning logic could go here
-            
-            count_eval += 1
-            if count_eval % 2000 == 0:
-                    if count_eval < MAX_CHECKS:
-                        progress_bar.progress(count_eval / MAX_CHECKS)
-                        status_text.text(f"Checked {count_eval} combos...")
-            if count_eval > MAX_CHECKS: break
-        if count_eval > MAX_CHECKS: break
-        
-    progress_bar.empty()
-    status_text.empty()
-    
-    # Sort and keep top 20 unique-ish results
-    # Sort by score ascending (lower deviation is better)
-    all_valid_results.sort(key=lambda x: x[0])
+    fraction = job.fraction_done()
+    if fraction is not None:
+        st.progress(fraction)
+    sc1, sc2 = st.columns([3, 1])
+    sc1.text(f"Searching... {job.checked:,} combos checked ({job.elapsed:.1f}s)")
+    if sc2.button("Cancel"):
+        job.cancel()
+    if job.plans:
+        # Anytime solver: the best list so far
+        st.dataframe(pd.DataFrame({
+            "Score": [p.score for p in job.plans],
+            "Marches": [", ".join(f"{m.main} + {m.deputy}" for m in p.marches) for p in job.plans],
+        }), hide_index=True)
+
+def finish_upgrades(job):
+    st.session_state.upgrade_job = None
+    st.session_state.upgrade_error = job.error
+    if job.error:
+        return
+    upgrades = job.upgrades
+    st.session_state.upgrade_results = pd.DataFrame({
+        "Hero": [u.hero for u in upgrades],
+        "Level": [f"{u.from_level} → {u.to_level}" for u in upgrades],
+        "Best Score": [round(u.score, 2) for u in upgrades],
+        "Improvement": [round(u.gain, 2) for u in upgrades],
+    })
+
+def show_upgrade_status():
+    # Polled like show_search_status while the upgrades are ranked
+    job = st.session_state.upgrade_job
+    if job is None:
+        return
+    if not job.running:
+        finish_upgrades(job)
+        st.rerun()
+    st.caption(f"Ranking skill upgrades... ({job.elapsed:.1f}s)")
+
+def run_sweep(start, stop, step):
+    try:
+        points = sweep_targets(selected_names, user_skill_levels, target_grid(start, stop, step), current_options())
+    except ConstraintError as e:
+        st.error(f"❌ Error: {e}")
+        return
     
-    st.session_state.optimization_results = all_valid_results[:20]
-    st.session_state.result_index = 0
+    st.session_state.sweep_results = pd.DataFrame({
+        "Target": [p.target for p in points],
+        "Score": [p.score for p in points],
+        "Marches": [", ".join(f"{m} + {d}" for m, d in p.pairs) for p in points],
+        "Sitting out": [p.benched or "" for p in points],
+    })
 
 # --- Main Action ---
 
 total_heroes = len(selected_names) + num_fillers
 
-if total_heroes > 10:
-    st.warning("⚠️ You have selected more than 10 heroes. This will attempt to create more than 5 marches, which may produce non-ideal results.")
+if total_heroes > 10 and SOLVER_MODES[solver_mode] != SOLVER_LOCAL_SEARCH:
+    st.warning("⚠️ You have selected more than 10 heroes. This will attempt to create more than 5 marches, which may produce non-ideal results. Exact optimum and Large roster (local search) handle big rosters quickly.")
 
 if total_heroes < 2:
     st.info("Select 2+ heroes (or add fillers).")
 else:
     if st.button("Optimize", type="primary"):
-        with st.spinner("Processing..."):
-            run_optimization()
+        start_search()
+    
+    # Changed inputs while a search is running: the running one is stale, restart with the new inputs
+    job = st.session_state.solve_job
+    if job is not None and job.running and job.key != search_key(selected_names, user_skill_levels, TARGET_SPEED, current_options()):
+        start_search()
+    
+    if st.session_state.solve_job is not None:
+        st.fragment(run_every=0.25)(show_search_status)()
+    if st.session_state.search_error:
+        st.error(f"❌ Error: {st.session_state.search_error}")
 
     # --- Display Logic ---
     if st.session_state.optimization_results:
@@ -546,10 +350,31 @@ else:
             idx = 0
             st.session_state.result_index = 0
             
-        score, best_set = results[idx]
+        score, best_set, benched = results[idx]
         
         st.divider()
         st.header("Results")
+        if st.session_state.search_summary:
+            st.caption(st.session_state.search_summary)
+            
+        # -- Trade-offs: pick a point on the front instead of paging through it --
+        is_front = st.session_state.results_solver == SOLVER_PARETO
+        if is_front and len(results) > 1:
+            front_df = pd.DataFrame({
+                "Deviation": [plan.score for plan in results],
+                "Synergy": [plan_synergy(plan.marches) for plan in results],
+            })
+            st.scatter_chart(front_df, x="Deviation", y="Synergy")
+            picked = st.select_slider(
+                "Trade-off",
+                options=list(range(len(results))),
+                value=idx,
+                format_func=lambda i: f"Deviation {front_df['Deviation'][i]:.2f} / Synergy {front_df['Synergy'][i]:+d}",
+                help="Left: closest to the target speed. Right: most synergy. Every step right buys synergy with deviation.",
+            )
+            if picked != idx:
+                st.session_state.result_index = picked
+                st.rerun()
         
         # -- Navigation Controls --
         col_prev, col_info, col_next = st.columns([1, 2, 1])
@@ -565,7 +390,11 @@ else:
                 st.rerun()
                 
         with col_info:
-            st.markdown(f"<div style='text-align: center'><b>Option {idx + 1} of {len(results)}</b><br>Score/Deviation: {score:.2f}</div>", unsafe_allow_html=True)
+            synergy_note = f" | Synergy: {plan_synergy(best_set):+d}" if is_front else ""
+            st.markdown(f"<div style='text-align: center'><b>Option {idx + 1} of {len(results)}</b><br>Score/Deviation: {score:.2f}{synergy_note}</div>", unsafe_allow_html=True)
+            
+        if benched:
+            st.caption(f"Sitting out: **{benched}**")
             
         # -- Metrics --
         speeds = [m.total_speed for m in best_set]
@@ -599,6 +428,42 @@ else:
                 ic2.info(match.skill_breakdown)
                 diff = match.total_speed - TARGET_SPEED
                 ic2.metric(f"Diff from Target", f"{diff:+.1f}%")
+        
+        # -- Skill upgrade what-if --
+        upgrade_df = st.session_state.upgrade_results
+        if upgrade_df is not None or st.session_state.upgrade_job is not None or st.session_state.upgrade_error:
+            with st.expander("Which skill to level next?"):
+                st.caption("Best achievable score if one hero's march speed skill goes up a level, best first. Heroes whose next level adds no speed aren't listed.")
+                if st.session_state.upgrade_job is not None:
+                    st.fragment(run_every=0.25)(show_upgrade_status)()
+                elif st.session_state.upgrade_error:
+                    st.error(f"❌ Error: {st.session_state.upgrade_error}")
+                elif upgrade_df.empty:
+                    st.caption("No skill upgrade changes a march speed.")
+                else:
+                    st.dataframe(upgrade_df, hide_index=True)
 
     elif len(selected_names) >= 2:
         st.info("Click 'Optimize' to start.")
+
+    # --- Target Sweep ---
+    with st.expander("Target Speed Sweep"):
+        st.caption("Best achievable score at every target speed, to see where this roster syncs best. Uses the current heroes, levels and forced pairings.")
+        sc1, sc2, sc3 = st.columns(3)
+        sweep_start = sc1.number_input("From (%)", min_value=10.0, max_value=100.0, value=SWEEP_START, step=0.5)
+        sweep_stop = sc2.number_input("To (%)", min_value=10.0, max_value=100.0, value=SWEEP_STOP, step=0.5)
+        sweep_step = sc3.number_input("Step (%)", min_value=0.1, max_value=10.0, value=SWEEP_STEP, step=0.1)
+        
+        if st.button("Run Sweep"):
+            if sweep_stop < sweep_start:
+                st.error("❌ Error: 'To' must be at least 'From'.")
+            else:
+                with st.spinner("Sweeping..."):
+                    run_sweep(sweep_start, sweep_stop, sweep_step)
+                
+        sweep_df = st.session_state.sweep_results
+        if sweep_df is not None and not sweep_df.empty:
+            best_row = sweep_df.loc[sweep_df["Score"].idxmin()]
+            st.markdown(f"**Best target:** {best_row['Target']:.1f}% (score {best_row['Score']:.2f})")
+            st.line_chart(sweep_df, x="Target", y="Score")
+            st.dataframe(sweep_df, hide_index=True)
@@ -0,0 +1,22 @@
+# Headless CoD speed sync solver: pure Python, no Streamlit or pandas needed.
+from .config import HERO_DATABASE, HERO_SYNERGIES, LUNARIS_SPEED_BY_LEVEL, MAX_CHECKS, MAX_TALENT_POINTS, TALENT_TREES_DEF, TOP_K_RESULTS
+from .heroes import GENERIC_HERO, HERO_IDS, HEROES, HeroRecord, base_hero_name, get_hero
+from .marches import MarchSetup, PairScoreCache, PairScores, build_pair_scores, get_skill_speed, march_deviation, march_total_speed, plan_synergy, solve_for_march
+from .optimizer import (
+    SOLVER_ANYTIME,
+    SOLVER_BRANCH_AND_BOUND,
+    SOLVER_ENUMERATE,
+    SOLVER_EXACT,
+    SOLVER_LOCAL_SEARCH,
+    SOLVER_PARETO,
+    SOLVERS,
+    ConstraintError,
+    MarchPlan,
+    OptimizeOptions,
+    OptimizeResult,
+    OptimizerState,
+    SearchStats,
+    optimize,
+)
+from .talents import TalentIndex, TalentOption, get_achievable_talent_speeds, get_talent_index, talent_speed_options
+from .whatif import UpgradeOption, upgrade_what_if
@@ -0,0 +1,136 @@
+# Runs optimize() (and the skill upgrade what-if) on daemon threads so a UI can keep rerunning its script
+# and just poll the job.
+# Callbacks only store plain data, they never touch the UI from the worker thread.
+from __future__ import annotations
+
+import threading
+import time
+from typing import Hashable, Optional
+
+from .optimizer import ConstraintError, MarchPlan, OptimizeOptions, OptimizeResult, OptimizerState, effective_time_budget, optimize
+from .whatif import UpgradeOption, upgrade_what_if
+
+def search_key(roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions) -> Hashable:
+    # Same key for the same search, whatever order the inputs were collected in
+    return (
+        tuple(roster),
+        tuple(sorted(levels.items())),
+        float(target),
+        options.neya_artifact_bonus,
+        options.is_theia_flying,
+        options.num_fillers,
+        tuple(options.forced_pairs),
+        tuple(sorted(options.forced_mains)),
+        options.solver,
+        options.top_k,
+        options.max_checks,
+        options.time_budget,
+        options.min_distance,
+        tuple(sorted(options.talent_reserve.items())),
+    )
+
+class SolveJob:
+    # cache: optional ResultCache; a hit finishes the job right away without starting a thread.
+    # state: optional OptimizerState shared by a session's jobs for incremental re-optimization.
+    def __init__(self, roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions, cache=None, state: Optional[OptimizerState] = None):
+        self.key = search_key(roster, levels, target, options)
+        self.options = options
+        self.checked = 0
+        self.plans: list[MarchPlan] = [] # latest improved list from the anytime solver
+        self.result: Optional[OptimizeResult] = None
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._cache = cache
+        self._state = state
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(list(roster), dict(levels), target), daemon=True)
+        
+        if cache is not None:
+            self.result = cache.get(roster, levels, target, options)
+        if self.result is not None:
+            self.finished = self.started
+        else:
+            self._thread.start()
+        
+    def _run(self, roster: list[str], levels: dict[str, int], target: float) -> None:
+        try:
+            self.result = optimize(roster, levels, target, self.options, progress=self._on_progress, on_update=self._on_update, cancel=self._cancel, state=self._state)
+            if self._cache is not None:
+                self._cache.put(roster, levels, target, self.options, self.result)
+        except ConstraintError as e:
+            self.error = str(e)
+        except Exception as e: # surfaced to the UI rather than lost with the thread
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.finished = time.perf_counter()
+            
+    def _on_progress(self, checked: int, max_checks: int) -> None:
+        self.checked = checked
+        
+    def _on_update(self, plans: list[MarchPlan]) -> None:
+        self.plans = plans
+        
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+    
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+    
+    def fraction_done(self) -> Optional[float]:
+        # Time used of the budget, for a progress bar. None without a budget: branch and bound prunes
+        # most of the combos, so checked / max_checks would sit near 0 and then jump to done.
+        time_budget = effective_time_budget(self.options)
+        if time_budget is None:
+            return None
+        return min(1.0, self.elapsed / time_budget)
+        
+    def cancel(self) -> None:
+        self._cancel.set()
+        
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return not self.running
+
+class UpgradeJob:
+    # upgrade_what_if after a search: one re-solve per hero, seconds for big rosters, so it runs like a
+    # SolveJob instead of on the UI thread. Sharing the session's OptimizerState is safe, its pair score
+    # cache takes a lock.
+    def __init__(self, roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions, state: Optional[OptimizerState] = None):
+        self.key = search_key(roster, levels, target, options)
+        self.upgrades: Optional[list[UpgradeOption]] = None
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(list(roster), dict(levels), target, options, state), daemon=True)
+        self._thread.start()
+
+    def _run(self, roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions, state: Optional[OptimizerState]) -> None:
+        try:
+            self.upgrades = upgrade_what_if(roster, levels, target, options, state, cancel=self._cancel)
+        except ConstraintError as e:
+            self.error = str(e)
+        except Exception as e: # surfaced to the UI rather than lost with the thread
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.finished = time.perf_counter()
+
+    @property
+    def running(self) -> bool:
+        return self.finished is None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        return not self.running
@@ -0,0 +1,101 @@
+# Alliance batch mode: optimize many rosters from JSONL or CSV on a process pool and stream
+# one JSONL result per roster to the output, always in input order.
+#
+#   python -m syncer.batch rosters.jsonl > plans.jsonl
+#   python -m syncer.batch rosters.csv -o plans.jsonl --workers 8
+#   python -m syncer.batch rosters.jsonl --cache ~/.cache/cod-speed-syncer/results.sqlite3
+#   python -m syncer.batch rosters.jsonl --stats > profile.jsonl
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, TextIO
+
+from .cache import ResultCache
+from .jobs import dict_from_csv_row, run_job_dict
+
+# One ResultCache per path and process, opened on first use in each worker
+_caches: dict[str, ResultCache] = {}
+
+class ParseError(NamedTuple):
+    # Stands in for a record that couldn't be read, so it still gets its ok=false line
+    id: str
+    message: str
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[tuple[str, Any]]:
+    # Yields (default_id, record); default ids are the 1-based line/row numbers.
+    # Unreadable lines and rows come through as ParseError records.
+    if fmt == "csv":
+        for row_no, row in enumerate(csv.DictReader(stream), 1):
+            try:
+                yield str(row_no), dict_from_csv_row(row)
+            except ValueError as e:
+                yield str(row_no), ParseError(row.get("id") or str(row_no), f"Bad CSV row: {e}")
+    else:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield str(line_no), json.loads(line)
+            except json.JSONDecodeError as e:
+                yield str(line_no), ParseError(str(line_no), f"Bad JSON: {e}")
+
+def _run_record(item: tuple[str, Any], cache_path: Optional[str] = None, include_stats: bool = False) -> dict[str, Any]:
+    default_id, record = item
+    if isinstance(record, ParseError):
+        return {"id": record.id, "ok": False, "error": record.message}
+    cache = None
+    if cache_path is not None:
+        if cache_path not in _caches:
+            _caches[cache_path] = ResultCache(cache_path)
+        cache = _caches[cache_path]
+    try:
+        return run_job_dict(record, default_id, cache, include_stats)
+    except Exception as e: # a solver bug on one roster shouldn't take the rest of the batch down
+        job_id = str(record.get("id", default_id)) if isinstance(record, dict) else default_id
+        return {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+def run_batch(records: Iterable[tuple[str, Any]], workers: int | None = None, chunksize: int = 4, cache_path: Optional[str] = None, include_stats: bool = False) -> Iterator[dict[str, Any]]:
+    # Results come back in input order regardless of which worker finishes first
+    run = partial(_run_record, cache_path=cache_path, include_stats=include_stats)
+    if workers == 1:
+        yield from map(run, records)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(run, records, chunksize=chunksize)
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m syncer.batch", description="Optimize many rosters and write one JSONL result per roster.")
+    parser.add_argument("input", help="JSONL or CSV file of rosters, or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores, 1 runs inline)")
+    parser.add_argument("--chunksize", type=int, default=4, help="Rosters handed to a worker at a time")
+    parser.add_argument("--cache", metavar="PATH", help="SQLite result cache to reuse and fill (default: no cache)")
+    parser.add_argument("--stats", action="store_true", help="Add phase timings and search counters to every result")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    failed = 0
+    try:
+        for result in run_batch(read_records(src, fmt), args.workers, args.chunksize, args.cache, args.stats):
+            failed += not result["ok"]
+            dst.write(json.dumps(result) + "\n")
+            dst.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
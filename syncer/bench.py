@@ -0,0 +1,322 @@
+# Solver benchmarks.
+#
+#   python -m syncer.bench suite -o bench_output.txt
+#   python -m syncer.bench suite --compare bench_output.txt   # against a run from another commit
+#   python -m syncer.bench alloc --heroes 14 --evaluations 200000
+#
+# suite runs fixed rosters (4-16 heroes, with Generics, forced mains, odd counts, Lunaris and Theia
+# flying) through each solver and writes one JSON line per (case, solver): wall time, evaluations/sec,
+# peak traced memory and the best score next to the exact optimum from the matching solver.
+#
+# alloc measures what each evaluated matching costs. allocations_per_eval counts the memory blocks a
+# generator leaves allocated per matching while everything it yields is kept alive: the yielded
+# (score, pair_list) tuple and its score float, plus the pair_list and pair tuples if they are new.
+# peak_kib is the traced peak of the same walk when nothing is kept.
+# display_per_eval counts solve_for_march calls (one MarchSetup, talent description and breakdown
+# string each) over a full optimize() run.
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Iterator, NamedTuple, Optional, TextIO
+
+from . import marches, optimizer
+from .config import HERO_DATABASE
+from .marches import build_pair_scores, hero_classes
+from .optimizer import OptimizeOptions, OptimizeResult, optimize
+from .search import all_pairs_generator, bounded_pairs_generator
+
+def bench_roster(heroes: int, seed: int = 0) -> tuple[list[str], dict[str, int]]:
+    # Same roster for the same arguments on every machine
+    rng = random.Random(seed)
+    names = rng.sample([h["Name"] for h in HERO_DATABASE], heroes)
+    return names, {h: rng.randint(1, 5) for h in names}
+
+def count_display_objects(roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions) -> tuple[int, int]:
+    # (solve_for_march calls, matchings checked) for one optimize() run
+    calls = 0
+    original = marches.solve_for_march
+
+    def counting(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return original(*args, **kwargs)
+
+    # Both names: the optimizer imports it, and the pair matrix used to score through it
+    optimizer.solve_for_march = marches.solve_for_march = counting
+    try:
+        result = optimize(roster, levels, target, options)
+    finally:
+        optimizer.solve_for_march = marches.solve_for_march = original
+    return calls, result.checked
+
+def _walk(generator: str, roster_ids: list[int], deviation: list[list[float]], classes: list[int]) -> Iterator[tuple[float, list[tuple[int, int]]]]:
+    # Both generators walk every matching (no cutoff), so they are compared on the same evaluations
+    if generator == "all_pairs_generator":
+        return ((sum(deviation[m][d] for m, d in pair_list), pair_list) for pair_list in all_pairs_generator(roster_ids, None, classes))
+    return bounded_pairs_generator(roster_ids, deviation, lambda: float("inf"), None, None, classes)
+
+def measure_search(generator: str, roster: list[str], levels: dict[str, int], target: float, evaluations: int) -> dict[str, Any]:
+    scores = build_pair_scores(roster, levels, target)
+    classes = hero_classes(scores.names, levels)
+    roster_ids = sorted(range(len(scores.names)), key=lambda i: (classes[i], i))
+    deviation = scores.deviation
+
+    # Every yielded (score, pair_list) is kept alive, so nothing the loop allocated can be freed and
+    # reused: the memory blocks still allocated afterwards count what each evaluation allocates
+    # (the yielded tuple and score, plus any new pair_list and pair tuples). Freed temporaries don't count.
+    kept = []
+    count = 0
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    for item in _walk(generator, roster_ids, deviation, classes):
+        kept.append(item)
+        count += 1
+        if count >= evaluations:
+            break
+    elapsed = time.perf_counter() - start
+    blocks = sys.getallocatedblocks() - blocks_before
+    del kept
+
+    # Peak memory of the same walk when the caller keeps nothing
+    count = 0
+    tracemalloc.start()
+    for _ in _walk(generator, roster_ids, deviation, classes):
+        count += 1
+        if count >= evaluations:
+            break
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "generator": generator,
+        "heroes": len(roster),
+        "evaluations": count,
+        "allocations_per_eval": round(blocks / max(count, 1), 4),
+        "peak_kib": round(peak / 1024, 1),
+        "seconds": round(elapsed, 4),
+    }
+
+def measure_display(solver: str, roster: list[str], levels: dict[str, int], target: float, evaluations: int, top_k: int) -> dict[str, Any]:
+    options = OptimizeOptions(solver=solver, top_k=top_k, max_checks=evaluations)
+    start = time.perf_counter()
+    display, checked = count_display_objects(roster, levels, target, options)
+    elapsed = time.perf_counter() - start
+    return {
+        "solver": solver,
+        "heroes": len(roster),
+        "evaluations": checked,
+        "display_objects": display,
+        "display_per_eval": round(display / max(checked, 1), 6),
+        "evals_per_sec": round(checked / elapsed) if elapsed > 0 else None,
+    }
+
+def run_bench(heroes: int = 12, evaluations: int = 100000, target: float = 50.0, seed: int = 0, top_k: int = 20) -> list[dict[str, Any]]:
+    roster, levels = bench_roster(heroes, seed)
+    rows = [measure_search(generator, roster, levels, target, evaluations) for generator in ("all_pairs_generator", "bounded_pairs_generator")]
+    rows += [measure_display(solver, roster, levels, target, evaluations, top_k) for solver in (optimizer.SOLVER_ENUMERATE, optimizer.SOLVER_BRANCH_AND_BOUND)]
+    return rows
+
+# Named in the code, not sampled from HERO_DATABASE, so new heroes don't change the rosters
+BENCH_HEROES = (
+    "Neya", "Lieh-Shan Yen", "Urag", "Emrys", "Forondil", "Tobin", "Bakshi", "Theodore",
+    "Mardok", "Freya", "Agnar", "Mu Hsiang", "Theia", "Seluna", "Falgrim", "Alistair",
+)
+LEVEL_PATTERN = (5, 4, 3, 5, 2, 4, 5, 1)
+BENCH_TARGET = 50.0
+SUITE_SOLVERS = (optimizer.SOLVER_BRANCH_AND_BOUND, optimizer.SOLVER_EXACT, optimizer.SOLVER_LOCAL_SEARCH, optimizer.SOLVER_ENUMERATE)
+# Full enumeration only up to this many heroes (incl. Generics), beyond it takes minutes
+ENUMERATE_MAX_HEROES = 10
+# Timed solvers get this long, so they stop on their own and not on the clock
+SUITE_TIME_BUDGET = 60.0
+# Compare: slower than this fraction counts as a regression
+REGRESSION_TOLERANCE = 0.10
+# ... unless both runs are faster than this, where timer noise dominates
+REGRESSION_MIN_SECONDS = 0.05
+
+class BenchCase(NamedTuple):
+    name: str
+    roster: list[str]
+    num_fillers: int = 0
+    forced_mains: frozenset[str] = frozenset()
+    neya_artifact_bonus: float = 0.0
+    is_theia_flying: bool = False
+
+    @property
+    def heroes(self) -> int:
+        return len(self.roster) + self.num_fillers
+
+    def levels(self) -> dict[str, int]:
+        return {h: LEVEL_PATTERN[i % len(LEVEL_PATTERN)] for i, h in enumerate(self.roster)}
+
+    def options(self, solver: str) -> OptimizeOptions:
+        return OptimizeOptions(
+            neya_artifact_bonus=self.neya_artifact_bonus,
+            is_theia_flying=self.is_theia_flying,
+            num_fillers=self.num_fillers,
+            forced_mains=set(self.forced_mains),
+            solver=solver,
+            max_checks=10**12,
+            time_budget=SUITE_TIME_BUDGET if solver in optimizer.TIMED_SOLVERS else None,
+        )
+
+BENCH_CASES = (
+    BenchCase("4", list(BENCH_HEROES[:4])),
+    BenchCase("4_generics", list(BENCH_HEROES[:2]), num_fillers=2),
+    BenchCase("8", list(BENCH_HEROES[:8])),
+    BenchCase("8_generics", list(BENCH_HEROES[:6]), num_fillers=2),
+    BenchCase("10", list(BENCH_HEROES[:10])),
+    BenchCase("10_forced_mains", list(BENCH_HEROES[:10]), forced_mains=frozenset({"Forondil", "Theodore"})),
+    BenchCase("11_odd", list(BENCH_HEROES[:11])),
+    BenchCase("12", list(BENCH_HEROES[:12])),
+    BenchCase("12_lunaris_theia", ["Neya"] + list(BENCH_HEROES[2:12]) + ["Theia"], neya_artifact_bonus=40.0, is_theia_flying=True),
+    BenchCase("12_generics", list(BENCH_HEROES[:10]), num_fillers=2),
+    BenchCase("15_odd", list(BENCH_HEROES[:15])),
+    BenchCase("16", list(BENCH_HEROES)),
+    BenchCase("16_generics", list(BENCH_HEROES[:14]), num_fillers=2),
+    BenchCase("16_forced_lunaris_theia", list(BENCH_HEROES), forced_mains=frozenset({"Forondil", "Seluna"}), neya_artifact_bonus=40.0, is_theia_flying=True),
+)
+
+def _commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+def _timed_run(case: BenchCase, solver: str) -> tuple[float, OptimizeResult]:
+    start = time.perf_counter()
+    result = optimize(case.roster, case.levels(), BENCH_TARGET, case.options(solver))
+    return time.perf_counter() - start, result
+
+def run_case(case: BenchCase, solver: str, repeat: int = 3, memory: bool = True) -> dict[str, Any]:
+    # Wall time is the best of repeat untraced runs; peak memory comes from one more run under tracemalloc
+    timings = [_timed_run(case, solver) for _ in range(repeat)]
+    wall, result = min(timings, key=lambda t: t[0])
+    peak = None
+    if memory:
+        tracemalloc.start()
+        optimize(case.roster, case.levels(), BENCH_TARGET, case.options(solver))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "case": case.name,
+        "solver": solver,
+        "heroes": case.heroes,
+        "wall_s": round(wall, 6),
+        "evaluations": result.checked,
+        "evals_per_sec": round(result.checked / wall) if result.checked and wall > 0 else None,
+        "pruned": result.pruned,
+        "peak_kib": None if peak is None else round(peak / 1024, 1),
+        "best": result.plans[0].score if result.plans else None,
+        "kth": result.plans[-1].score if result.plans else None,
+        "plans": len(result.plans),
+    }
+
+def run_suite(cases=BENCH_CASES, solvers=SUITE_SOLVERS, repeat: int = 3, memory: bool = True) -> list[dict[str, Any]]:
+    rows = []
+    for case in cases:
+        # Reference optimum: the matching solver is exact whatever the roster size
+        _, reference = _timed_run(case, optimizer.SOLVER_EXACT)
+        optimum = reference.plans[0].score
+        for solver in solvers:
+            if solver == optimizer.SOLVER_ENUMERATE and case.heroes > ENUMERATE_MAX_HEROES:
+                continue
+            row = run_case(case, solver, repeat, memory)
+            row["optimum"] = optimum
+            row["gap"] = None if row["best"] is None else round(row["best"] - optimum, 9)
+            rows.append(row)
+    return rows
+
+def suite_meta() -> dict[str, Any]:
+    return {"meta": {"commit": _commit(), "python": platform.python_version(), "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}}
+
+def read_suite(stream: TextIO) -> dict[tuple[str, str], dict[str, Any]]:
+    rows = {}
+    for line in stream:
+        if line.strip():
+            row = json.loads(line)
+            if "case" in row:
+                rows[(row["case"], row["solver"])] = row
+    return rows
+
+def compare_suites(previous: dict[tuple[str, str], dict[str, Any]], current: list[dict[str, Any]], tolerance: float = REGRESSION_TOLERANCE) -> list[dict[str, Any]]:
+    # One record per (case, solver) in both runs; regression if slower beyond tolerance or a worse best score
+    diffs = []
+    for row in current:
+        old = previous.get((row["case"], row["solver"]))
+        if old is None:
+            continue
+        time_ratio = row["wall_s"] / old["wall_s"] if old["wall_s"] else None
+        slower = time_ratio is not None and time_ratio > 1 + tolerance and row["wall_s"] >= REGRESSION_MIN_SECONDS
+        worse = old["best"] is not None and (row["best"] is None or row["best"] > old["best"] + 1e-9)
+        diffs.append({
+            "case": row["case"],
+            "solver": row["solver"],
+            "wall_ratio": None if time_ratio is None else round(time_ratio, 3),
+            "best_before": old["best"],
+            "best_after": row["best"],
+            "regression": slower or worse,
+        })
+    return diffs
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m syncer.bench", description="Solver benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    suite = commands.add_parser("suite", help="Fixed rosters through every solver, one JSON line per (case, solver)")
+    suite.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    suite.add_argument("--compare", metavar="PREVIOUS", help="Earlier suite output: report slowdowns and worse scores, exit 1 on a regression")
+    suite.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Slowdown fraction that counts as a regression")
+    suite.add_argument("--cases", nargs="+", choices=[c.name for c in BENCH_CASES], help="Only these cases")
+    suite.add_argument("--solvers", nargs="+", choices=optimizer.SOLVERS, default=list(SUITE_SOLVERS), help="Solvers to run")
+    suite.add_argument("--repeat", type=int, default=3, help="Timed runs per (case, solver), the fastest counts")
+    suite.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run for peak memory")
+
+    alloc = commands.add_parser("alloc", help="Objects allocated per evaluated matching in the search loop")
+    alloc.add_argument("--heroes", type=int, default=12, help="Roster size (default: 12)")
+    alloc.add_argument("--evaluations", type=int, default=100000, help="Matchings to evaluate per generator")
+    alloc.add_argument("--target", type=float, default=50.0, help="Target march speed")
+    alloc.add_argument("--seed", type=int, default=0, help="Roster seed")
+    args = parser.parse_args(argv)
+
+    if args.command == "alloc":
+        for row in run_bench(args.heroes, args.evaluations, args.target, args.seed):
+            print(json.dumps(row))
+        return 0
+
+    previous = None
+    if args.compare:
+        # Read first: --compare and --output may be the same file
+        with open(args.compare, encoding="utf-8") as f:
+            previous = read_suite(f)
+    cases = [c for c in BENCH_CASES if args.cases is None or c.name in args.cases]
+    rows = run_suite(cases, args.solvers, args.repeat, not args.no_memory)
+
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        dst.write(json.dumps(suite_meta()) + "\n")
+        for row in rows:
+            dst.write(json.dumps(row) + "\n")
+    finally:
+        if dst is not sys.stdout:
+            dst.close()
+
+    if previous is None:
+        return 0
+    diffs = compare_suites(previous, rows, args.tolerance)
+    for diff in diffs:
+        print(json.dumps(diff), file=sys.stderr)
+    return 1 if any(d["regression"] for d in diffs) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# Persistent result cache in SQLite, shared by every session and process that opens the same file.
+# Keys hash the normalised inputs together with a hash of the game data, so editing HERO_DATABASE,
+# TALENT_TREES_DEF or the other tables makes old entries unreachable; they are purged on open.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from . import config
+from .jobs import result_from_dict, result_to_dict
+from .optimizer import OptimizeOptions, OptimizeResult, SearchStats
+
+# Bump when the stored result format or the key inputs change
+CACHE_SCHEMA = 4
+CACHE_PATH_ENV = "SYNCER_CACHE_PATH"
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "cod-speed-syncer", "results.sqlite3")
+# Least recently used entries beyond this are evicted
+CACHE_MAX_ENTRIES = 5000
+# Seconds to wait for another process holding the write lock
+SQLITE_TIMEOUT = 5.0
+
+def data_version() -> str:
+    # Everything in config that changes what a search returns
+    data = [
+        CACHE_SCHEMA,
+        config.HERO_DATABASE,
+        config.TALENT_TREES_DEF,
+        config.MAX_TALENT_POINTS,
+        config.INNATE_SPEED_BONUS,
+        config.BIG_TALENT_EFFECTS,
+        config.THEIA_FLYING_SKILL_SPEEDS,
+        config.LUNARIS_HERO,
+        config.HERO_SYNERGIES,
+        config.SYNERGY_POINTS,
+        config.TYPE_MISMATCH_POINTS,
+        config.BENCH_DEVIATION,
+    ]
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+DATA_VERSION = data_version()
+
+def canonical_inputs(roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions) -> dict[str, Any]:
+    # Same dict for inputs that can only give the same answer: only the levels of heroes in the search
+    # (missing ones count as 1, like march_speed_parts). The roster and pinned pairs keep their order:
+    # it decides the order of the marches and which of two tied plans is listed first.
+    heroes = set(roster) | {h for pair in options.forced_pairs for h in pair}
+    return {
+        "roster": list(roster),
+        "levels": {h: int(levels.get(h, 1)) for h in sorted(heroes)},
+        "target": round(float(target), 6),
+        "neya_artifact_bonus": float(options.neya_artifact_bonus),
+        "is_theia_flying": bool(options.is_theia_flying),
+        "num_fillers": int(options.num_fillers),
+        "forced_pairs": [[m, d] for m, d in options.forced_pairs],
+        "forced_mains": sorted(options.forced_mains),
+        "solver": options.solver,
+        "top_k": int(options.top_k),
+        "max_checks": int(options.max_checks),
+        "time_budget": options.time_budget,
+        "min_distance": int(options.min_distance),
+        "talent_reserve": {tree: int(points) for tree, points in sorted(options.talent_reserve.items()) if points},
+    }
+
+def input_hash(roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions) -> str:
+    canonical = json.dumps(canonical_inputs(roster, levels, target, options), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256((DATA_VERSION + canonical).encode()).hexdigest()
+
+class ResultCache:
+    # Never gets in the way of solving: if the file can't be used, lookups miss and stores are dropped
+    def __init__(self, path: Optional[str] = None, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path or os.environ.get(CACHE_PATH_ENV) or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+        self.available = True
+        try:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "key TEXT PRIMARY KEY, data_version TEXT NOT NULL, payload TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+                # Results from other game data can never be hit again
+                conn.execute("DELETE FROM results WHERE data_version != ?", (DATA_VERSION,))
+        except (sqlite3.Error, OSError):
+            self.available = False
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call, so the cache can be used from any thread
+        conn = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions) -> Optional[OptimizeResult]:
+        if not self.available:
+            return None
+        started = time.perf_counter()
+        key = input_hash(roster, levels, target, options)
+        try:
+            with self._connection() as conn:
+                row = conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            return None
+        result = result_from_dict(json.loads(row[0]))
+        result.cached = True
+        result.stats = SearchStats(phases={"cache_lookup": time.perf_counter() - started}, result_cache_hit=True)
+        return result
+
+    def put(self, roster: list[str], levels: dict[str, int], target: float, options: OptimizeOptions, result: OptimizeResult) -> None:
+        # Searches cut short by time or cancel depend on the machine, and a warm-started one that
+        # stopped at max_checks on what ran before it: only complete, history-free results are kept
+        if not self.available or result.cancelled or result.timed_out:
+            return
+        if result.warm_started and not result.proven_optimal:
+            return
+        key = input_hash(roster, levels, target, options)
+        payload = json.dumps(result_to_dict(result))
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, data_version, payload, last_used) VALUES (?, ?, ?, ?)",
+                    (key, DATA_VERSION, payload, time.time()),
+                )
+                conn.execute(
+                    "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+        except sqlite3.Error:
+            pass
+
+    def __len__(self) -> int:
+        if not self.available:
+            return 0
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        if not self.available:
+            return
+        with self._connection() as conn:
+            conn.execute("DELETE FROM results")
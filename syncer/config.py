@@ -0,0 +1,176 @@
+# Game data and tuning constants shared by the solver and the front ends
+
+# Talent Tree Definitions
+TALENT_TREES_DEF = {
+    "Cavalry": {5: 15.0},
+    "Pvp": {10: 10.0, 21: 20.0},
+    "Tank": {10: 10.0, 21: 20.0},
+    "Mobility": {5: 10.0, 15: 20.0, 26: 25.0},
+    "Overall": {10: 10.0},
+    "Peacekeeping": {10: 10.0},
+    "Control": {5: 10.0},
+    "Support": {},
+    "Skills": {}
+}
+MAX_TALENT_POINTS = 49
+INNATE_SPEED_BONUS = 6.0
+
+# Number of ranked options kept for the results browser
+TOP_K_RESULTS = 20
+# Enumeration budget for the top-K solvers
+MAX_CHECKS = 100000
+
+# Odd rosters: virtual partner of the hero that sits out, and the deviation that costs
+BENCH_NAME = "Bench"
+BENCH_DEVIATION = 0.0
+
+# Big Talents (Keystone) - Main Hero Only
+BIG_TALENT_EFFECTS = {
+    "Balanced Heart": 5.0,
+    "Mighty Power": 0.0,
+    "Shield of Stability": -2.0,
+    "Backstabber": 0.0,
+    "Transforming Spirit": 0.0
+}
+
+HERO_DATABASE = [
+    {
+        "Name": "Neya",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp", "Mobility"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Balanced Heart"
+    },
+    {
+        "Name": "Lieh-Shan Yen",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry"],
+        "Skill_Speeds": [0.0] * 5,
+        "Big_Talent": "Mighty Power"
+    },
+    {
+        "Name": "Urag",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Mighty Power"
+    },
+    {
+        "Name": "Emrys",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp", "Mobility"],
+        "Skill_Speeds": [3.0, 4.5, 6.0, 8.0, 10.0],
+        "Big_Talent": "Balanced Heart"
+    },
+    {
+        "Name": "Forondil",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp", "Control"],
+        "Skill_Speeds": [10.0, 12.0, 14.0, 16.0, 20.0],
+        "Special_Rule": "Main_Only",
+        "Big_Talent": "Balanced Heart"
+    },
+    {
+        "Name": "Tobin",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Tank"],
+        "Skill_Speeds": [0.0] * 5,
+        "Big_Talent": "Shield of Stability"
+    },
+    {
+        "Name": "Bakshi",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Peacekeeping"],
+        "Skill_Speeds": [0.0] * 5,
+        "Big_Talent": "Mighty Power"
+    },
+    {
+        "Name": "Theodore",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Mighty Power"
+    },
+    {
+        "Name": "Mardok",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp", "Mobility"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Balanced Heart"
+    },
+    {
+        "Name": "Freya",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Control"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Backstabber"
+    },
+    {
+        "Name": "Agnar",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Pvp"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Mighty Power"
+    },
+    {
+        "Name": "Mu Hsiang",
+        "Type": "Cavalry",
+        "Trees": ["Overall", "Pvp", "Support"],
+        "Skill_Speeds": [0.0] * 5,
+        "Big_Talent": "Transforming Spirit"
+    },
+    {
+        "Name": "Theia",
+        "Type": "Cavalry", # Conditional Flying
+        "Trees": ["Overall", "Pvp", "Support"],
+        "Skill_Speeds": [0.0] * 5, # Special rule handling needed
+        "Big_Talent": "Transforming Spirit", # Guessing? User didn't specify. Assuming neutral like others or user can correct.
+        # Wait, user didn't specify big talent for Theia/Seluna. I'll default to "Mighty Power" (0) or similar to be safe.
+        # Actually user said "Mu Hsiang has a new big talent...". 
+        # I will assume "Mighty Power" (0 impact) for Theia/Seluna unless told otherwise.
+        "Special_Rule": "Theia_Flying" 
+    },
+    {
+        "Name": "Seluna",
+        "Type": "Cavalry",
+        "Trees": ["Overall", "Pvp", "Skills"],
+        "Skill_Speeds": [8.0, 10.0, 12.0, 16.0, 20.0],
+        "Big_Talent": "Mighty Power" # Default
+    },
+    {
+        "Name": "Falgrim",
+        "Type": "Cavalry",
+        "Trees": ["Pvp"],
+        "Skill_Speeds": [4.0, 5.0, 6.0, 8.0, 10.0],
+        "Big_Talent": "Mighty Power" # Default
+    },
+    {
+        "Name": "Alistair",
+        "Type": "Cavalry",
+        "Trees": ["Cavalry", "Tank"],
+        "Skill_Speeds": [0.0] * 5,
+        "Big_Talent": "Mighty Power" # Default
+    }
+]
+
+# Highest march speed skill level (Skill_Speeds has one entry per level)
+MAX_SKILL_LEVEL = 5
+
+# Skill speeds for Theia when she leads Flying units (otherwise she has none)
+THEIA_FLYING_SKILL_SPEEDS = [10.0, 12.0, 14.0, 16.0, 20.0]
+# Hero whose presence in a march enables the Lunaris artifact bonus
+LUNARIS_HERO = "Neya"
+# Lunaris march speed bonus by artifact level
+LUNARIS_SPEED_BY_LEVEL = {1: 20.0, 2: 25.0, 3: 30.0, 4: 35.0, 5: 40.0}
+
+# Synergy Definitions (Bidirectional or Directional)
+# Format: "HeroName": {"PartnerName": "Type"}
+# Types: "Synergy" (Green), "Anti-Synergy" (Red)
+HERO_SYNERGIES = {
+    # Placeholders - User to provide
+}
+
+# Pareto mode's second objective: points per march for its synergy, higher is better
+SYNERGY_POINTS = {"Synergy": 1, "Anti-Synergy": -1}
+# Added when main and deputy are of different troop types
+TYPE_MISMATCH_POINTS = -1
@@ -0,0 +1,69 @@
+from .config import BIG_TALENT_EFFECTS, HERO_DATABASE, LUNARIS_HERO, MAX_SKILL_LEVEL, THEIA_FLYING_SKILL_SPEEDS
+
+class HeroRecord:
+    # Compiled hero entry. Special rules are pre-resolved into skill_speeds, indexed as
+    # skill_speeds[is_theia_flying][is_main][level] with level clamped to 0..MAX_SKILL_LEVEL.
+    __slots__ = ("id", "name", "type", "trees", "big_talent", "big_talent_value", "skill_speeds", "has_lunaris", "is_generic")
+    
+    def __init__(self, hero_id, name, hero_type, trees, big_talent, skill_speeds, has_lunaris=False, is_generic=False):
+        self.id = hero_id
+        self.name = name
+        self.type = hero_type
+        self.trees = trees
+        self.big_talent = big_talent
+        self.big_talent_value = BIG_TALENT_EFFECTS.get(big_talent, 0.0)
+        self.skill_speeds = skill_speeds
+        self.has_lunaris = has_lunaris
+        self.is_generic = is_generic
+        
+    def skill_speed(self, level, is_main, is_theia_flying=False):
+        if level < 1:
+            return 0.0
+        return self.skill_speeds[is_theia_flying][is_main][min(level, MAX_SKILL_LEVEL)]
+
+def compile_hero_table(hero_database):
+    # Integer ids follow HERO_DATABASE order. Returns (records, name -> id).
+    no_skill = (0.0,) * 6
+    records = []
+    for hero_id, hero in enumerate(hero_database):
+        rule = hero.get("Special_Rule")
+        base = (0.0,) + tuple(hero.get("Skill_Speeds", [0.0] * 5))
+        if rule == "Theia_Flying":
+            flying = (0.0,) + tuple(THEIA_FLYING_SKILL_SPEEDS)
+            # [is_theia_flying][is_main]
+            skill_speeds = ((no_skill, no_skill), (flying, flying))
+        elif rule == "Main_Only":
+            skill_speeds = ((no_skill, base), (no_skill, base))
+        else:
+            skill_speeds = ((base, base), (base, base))
+            
+        records.append(HeroRecord(
+            hero_id,
+            hero["Name"],
+            hero["Type"],
+            tuple(hero["Trees"]),
+            hero.get("Big_Talent", "Mighty Power"),
+            skill_speeds,
+            has_lunaris=(hero["Name"] == LUNARIS_HERO)
+        ))
+    return records, {record.name: record.id for record in records}
+
+HEROES, HERO_IDS = compile_hero_table(HERO_DATABASE)
+
+# Shared record for the "Generic N" fillers: Cavalry, no skills, talents or big talent
+GENERIC_HERO = HeroRecord(-1, "Generic", "Cavalry", (), "None", (((0.0,) * 6,) * 2,) * 2, is_generic=True)
+
+# Pooled rosters can hold the same hero several times, told apart as "Neya@Player": the part
+# after the @ only names whose hero it is
+OWNER_SEPARATOR = "@"
+
+def base_hero_name(name):
+    return name.split(OWNER_SEPARATOR, 1)[0].strip()
+
+def get_hero(name):
+    hero_id = HERO_IDS.get(base_hero_name(name))
+    if hero_id is not None:
+        return HEROES[hero_id]
+    if name.startswith("Generic"):
+        return GENERIC_HERO
+    raise KeyError(f"Unknown hero: {name}")
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .config import LUNARIS_SPEED_BY_LEVEL
+from .marches import MarchSetup
+from .optimizer import SOLVER_BRANCH_AND_BOUND, ConstraintError, MarchPlan, OptimizeOptions, OptimizeResult, OptimizerState, optimize
+
+# Skill level assumed for heroes missing from "levels" (the app's default)
+DEFAULT_SKILL_LEVEL = 5
+
+# Plain-data form of one optimization request, shared by the batch runner and other non-UI callers:
+#   {"id": "...", "heroes": [...], "levels": {"Neya": 5}, "target": 50, "lunaris_level": 5,
+#    "theia_flying": false, "fillers": 0, "forced_pairs": [["Neya", "Urag"]], "forced_mains": [...],
+#    "solver": "branch_and_bound", "time_budget": 0.5, "min_distance": 2, "talent_reserve": {"Pvp": 21}}
+
+@dataclass
+class RosterJob:
+    id: str
+    heroes: list[str]
+    levels: dict[str, int]
+    target: float
+    options: OptimizeOptions
+
+def job_from_dict(data: dict[str, Any], default_id: str = "") -> RosterJob:
+    # Raises ValueError for malformed or out-of-range fields, whatever their type
+    try:
+        return _parse_job(data, default_id)
+    except (TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed job: {e}") from None
+
+def _parse_job(data: dict[str, Any], default_id: str) -> RosterJob:
+    heroes = [str(h) for h in data.get("heroes", [])]
+    levels = {name: DEFAULT_SKILL_LEVEL for name in heroes}
+    levels.update({str(name): int(lvl) for name, lvl in (data.get("levels") or {}).items()})
+
+    lunaris_level = data.get("lunaris_level")
+    neya_artifact_bonus = 0.0
+    if lunaris_level:
+        if int(lunaris_level) not in LUNARIS_SPEED_BY_LEVEL:
+            raise ValueError(f"Unknown lunaris_level {lunaris_level}: use {min(LUNARIS_SPEED_BY_LEVEL)}-{max(LUNARIS_SPEED_BY_LEVEL)}")
+        neya_artifact_bonus = LUNARIS_SPEED_BY_LEVEL[int(lunaris_level)]
+    options = OptimizeOptions(
+        neya_artifact_bonus=neya_artifact_bonus,
+        is_theia_flying=bool(data.get("theia_flying", False)),
+        num_fillers=int(data.get("fillers", 0)),
+        forced_pairs=[(str(m), str(d)) for m, d in data.get("forced_pairs", [])],
+        forced_mains={str(h) for h in data.get("forced_mains", [])},
+        solver=data.get("solver") or SOLVER_BRANCH_AND_BOUND,
+    )
+    if "top_k" in data:
+        options.top_k = int(data["top_k"])
+        if options.top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {options.top_k}")
+    if data.get("time_budget") is not None:
+        options.time_budget = float(data["time_budget"])
+    if data.get("min_distance"):
+        options.min_distance = int(data["min_distance"])
+        if options.min_distance < 0:
+            raise ValueError(f"min_distance can't be negative, got {options.min_distance}")
+    if data.get("talent_reserve"):
+        options.talent_reserve = {str(tree): int(points) for tree, points in data["talent_reserve"].items()}
+    return RosterJob(str(data.get("id", default_id)), heroes, levels, float(data.get("target", 50.0)), options)
+
+def _split(value: str) -> list[str]:
+    return [part.strip() for part in (value or "").split(";") if part.strip()]
+
+def dict_from_csv_row(row: dict[str, str]) -> dict[str, Any]:
+    # CSV columns mirror the JSON keys; list cells are ";"-separated:
+    #   heroes "Neya;Urag", levels "Neya:5;Urag:4", forced_pairs "Neya>Urag", forced_mains "Forondil",
+    #   talent_reserve "Pvp:21"
+    data: dict[str, Any] = {"heroes": _split(row.get("heroes", ""))}
+    if row.get("id"):
+        data["id"] = row["id"]
+    if row.get("target"):
+        data["target"] = float(row["target"])
+    if row.get("lunaris_level"):
+        data["lunaris_level"] = int(row["lunaris_level"])
+    if row.get("fillers"):
+        data["fillers"] = int(row["fillers"])
+    if row.get("solver"):
+        data["solver"] = row["solver"].strip()
+    if row.get("min_distance"):
+        data["min_distance"] = int(row["min_distance"])
+    data["theia_flying"] = (row.get("theia_flying") or "").strip().lower() in ("1", "true", "yes", "y")
+    data["levels"] = {name.strip(): int(lvl) for name, lvl in (item.rsplit(":", 1) for item in _split(row.get("levels", "")))}
+    data["forced_pairs"] = [item.split(">", 1) for item in _split(row.get("forced_pairs", ""))]
+    data["forced_mains"] = _split(row.get("forced_mains", ""))
+    data["talent_reserve"] = {tree.strip(): int(points) for tree, points in (item.rsplit(":", 1) for item in _split(row.get("talent_reserve", "")))}
+    return data
+
+def result_to_dict(result: OptimizeResult, include_stats: bool = False) -> dict[str, Any]:
+    # include_stats adds the phase timings and search counters (SearchStats.to_dict)
+    data = {
+        "plans": [
+            {
+                "score": plan.score,
+                "benched": plan.benched,
+                "marches": [march._asdict() for march in plan.marches],
+            }
+            for plan in result.plans
+        ],
+        "checked": result.checked,
+        "pruned": result.pruned,
+        "hit_limit": result.hit_limit,
+        "timed_out": result.timed_out,
+        "cancelled": result.cancelled,
+        "proven_optimal": result.proven_optimal,
+        "lower_bound": result.lower_bound,
+    }
+    if include_stats:
+        data["stats"] = result.stats.to_dict()
+    return data
+
+def result_from_dict(data: dict[str, Any]) -> OptimizeResult:
+    # Inverse of result_to_dict
+    return OptimizeResult(
+        plans=[
+            MarchPlan(plan["score"], [MarchSetup(**march) for march in plan["marches"]], plan["benched"])
+            for plan in data["plans"]
+        ],
+        checked=data.get("checked", 0),
+        pruned=data.get("pruned", 0),
+        hit_limit=data.get("hit_limit", False),
+        timed_out=data.get("timed_out", False),
+        cancelled=data.get("cancelled", False),
+        proven_optimal=data.get("proven_optimal", False),
+        lower_bound=data.get("lower_bound"),
+    )
+
+# Raised by bad job input: malformed fields, unknown heroes or solvers, impossible constraints.
+# Anything else out of optimize() is a bug and propagates.
+JOB_INPUT_ERRORS = (ConstraintError, ValueError, KeyError)
+
+def job_error(job_id: str, error: Exception) -> dict[str, Any]:
+    message = error.args[0] if isinstance(error, KeyError) and error.args else str(error)
+    return {"id": job_id, "ok": False, "error": message}
+
+def run_job_dict(data: dict[str, Any], default_id: str = "", cache=None, include_stats: bool = False, state: Optional[OptimizerState] = None) -> dict[str, Any]:
+    # Never raises for bad input: problems come back as {"id", "ok": False, "error"}. Solver bugs do raise.
+    # cache: optional ResultCache, checked before solving and filled after
+    # state: optional OptimizerState passed on to optimize()
+    job_id = str(data.get("id", default_id)) if isinstance(data, dict) else default_id
+    try:
+        job = job_from_dict(data, default_id)
+        result = cache.get(job.heroes, job.levels, job.target, job.options) if cache is not None else None
+        if result is None:
+            result = optimize(job.heroes, job.levels, job.target, job.options, state=state)
+            if cache is not None:
+                cache.put(job.heroes, job.levels, job.target, job.options, result)
+    except JOB_INPUT_ERRORS as e:
+        return job_error(job_id, e)
+    return {"id": job.id, "ok": True, **result_to_dict(result, include_stats)}
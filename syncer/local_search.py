@@ -0,0 +1,136 @@
+# Iterated local search for rosters too big to enumerate (30-100+ heroes): a starting matching (the
+# optimizer passes the matching solver's optimum, else a greedy seed), pair-swap (2-opt) moves until no
+# swap helps, then random kicks from the best matching found. Its job is the alternatives around the best.
+# Works on the same deviation matrix as the exact solvers, so forced mains and Main_Only are honoured the
+# same way; pinned pairs never reach it (prepare_roster takes them out).
+import random
+
+from .search import greedy_pairing
+
+# Kicks after the first local optimum; the time budget usually ends the search first
+LOCAL_SEARCH_RESTARTS = 200
+# Pairs broken up and re-paired at random by each kick
+KICK_PAIRS = 3
+# Smallest gain that counts as an improvement (float noise on equal sums)
+IMPROVE_EPSILON = 1e-9
+
+def oriented_costs(deviation, roster_ids, forced_mains):
+    # cost[a][b] and main[a][b] over positions in roster_ids: the cheaper allowed orientation of the
+    # pair, which folds the main/deputy flip move into every pair's cost. inf if both are forced mains.
+    n = len(roster_ids)
+    inf = float("inf")
+    cost = [[inf] * n for _ in range(n)]
+    main = [[None] * n for _ in range(n)]
+    for a in range(n):
+        i = roster_ids[a]
+        for b in range(n):
+            j = roster_ids[b]
+            if a == b:
+                continue
+            if j not in forced_mains and (i in forced_mains or deviation[i][j] <= deviation[j][i]):
+                cost[a][b], main[a][b] = deviation[i][j], i
+            elif i not in forced_mains:
+                cost[a][b], main[a][b] = deviation[j][i], j
+    return cost, main
+
+def seed_pairing(deviation, roster_ids, forced_mains, cost):
+    # Greedy cheapest-march-first; if that corners itself on forced mains, give every forced main
+    # its cheapest free deputy first and pair the rest greedily. Pairs are positions, or None.
+    found = greedy_pairing(roster_ids, deviation, forced_mains)
+    if found is not None:
+        position = {h: a for a, h in enumerate(roster_ids)}
+        return [(position[m], position[d]) for m, d in found[1]]
+
+    forced = [a for a, h in enumerate(roster_ids) if h in forced_mains]
+    free = [a for a, h in enumerate(roster_ids) if h not in forced_mains]
+    if len(forced) > len(free):
+        return None
+    pairs = []
+    for a in forced:
+        b = min(free, key=lambda b: cost[a][b])
+        free.remove(b)
+        pairs.append((a, b))
+    while free:
+        a = free.pop(0)
+        b = min(free, key=lambda b: cost[a][b])
+        free.remove(b)
+        pairs.append((a, b))
+    return pairs
+
+def two_opt(pairs, cost):
+    # Pair swap (a, b)(c, d) -> (a, c)(b, d) or (a, d)(b, c) until no swap lowers the total. In place.
+    m = len(pairs)
+    improved = True
+    while improved:
+        improved = False
+        for p in range(m):
+            for q in range(p + 1, m):
+                a, b = pairs[p]
+                c, d = pairs[q]
+                current = cost[a][b] + cost[c][d]
+                swap_ac = cost[a][c] + cost[b][d]
+                swap_ad = cost[a][d] + cost[b][c]
+                if swap_ac <= swap_ad and swap_ac < current - IMPROVE_EPSILON:
+                    pairs[p], pairs[q] = (a, c), (b, d)
+                    improved = True
+                elif swap_ad < current - IMPROVE_EPSILON:
+                    pairs[p], pairs[q] = (a, d), (b, c)
+                    improved = True
+
+def local_search_pairings(deviation, roster_ids, forced_mains=None, restarts=LOCAL_SEARCH_RESTARTS, stats=None, should_stop=None, seed=0, initial=None):
+    # Yields (deviation, pair_list) for every local optimum reached: the seed's first, then one per kick.
+    # Same output shape as bounded_pairs_generator; a matching can come up more than once.
+    # initial: a (main, deputy) pair_list over roster_ids to start from instead of the greedy seed.
+    if forced_mains is None:
+        forced_mains = set()
+    if stats is None:
+        stats = {}
+    stats.setdefault("stopped", False)
+
+    if len(roster_ids) < 2:
+        yield 0.0, []
+        return
+
+    cost, main = oriented_costs(deviation, roster_ids, forced_mains)
+    if initial is not None:
+        position = {h: a for a, h in enumerate(roster_ids)}
+        pairs = [(position[m], position[d]) for m, d in initial]
+    else:
+        pairs = seed_pairing(deviation, roster_ids, forced_mains, cost)
+    if pairs is None:
+        return
+
+    def as_result(pairs):
+        total = 0.0
+        pair_list = []
+        for a, b in pairs:
+            total += cost[a][b]
+            m = main[a][b]
+            pair_list.append((m, roster_ids[b] if m == roster_ids[a] else roster_ids[a]))
+        return total, pair_list
+
+    rng = random.Random(seed)
+    two_opt(pairs, cost)
+    best, best_total = pairs, sum(cost[a][b] for a, b in pairs)
+    yield as_result(best)
+
+    for _ in range(restarts):
+        if should_stop is not None and should_stop():
+            stats["stopped"] = True
+            return
+
+        # Kick: re-pair a few random pairs of the best matching at random, then descend again
+        pairs = list(best)
+        picked = rng.sample(range(len(pairs)), min(KICK_PAIRS, len(pairs)))
+        heroes = [h for p in picked for h in pairs[p]]
+        rng.shuffle(heroes)
+        for k, p in enumerate(picked):
+            pairs[p] = (heroes[2 * k], heroes[2 * k + 1])
+        two_opt(pairs, cost)
+
+        total = sum(cost[a][b] for a, b in pairs)
+        if total == float("inf"):
+            continue
+        if total < best_total - IMPROVE_EPSILON:
+            best, best_total = pairs, total
+        yield as_result(pairs)
@@ -0,0 +1,255 @@
+import threading
+from collections import namedtuple
+
+from .config import BENCH_DEVIATION, BENCH_NAME, HERO_SYNERGIES, SYNERGY_POINTS, TYPE_MISMATCH_POINTS
+from .heroes import base_hero_name, get_hero
+from .talents import get_talent_index
+
+MarchSetup = namedtuple('MarchSetup', ['main', 'deputy', 'total_speed', 'talent_config', 'synergy_match', 'skill_breakdown', 'specific_synergy'])
+
+def get_skill_speed(hero_name, level, is_main, is_theia_flying=False):
+    return get_hero(hero_name).skill_speed(level, is_main, is_theia_flying)
+
+def march_speed_parts(main, deputy, user_skill_inputs_levels, neya_artifact_bonus=0.0, is_theia_flying=False):
+    # Everything in a march's speed except talents: (main skill, deputy skill, big talent value, artifact bonus)
+    m_data = get_hero(main)
+    d_data = get_hero(deputy)
+
+    m_lvl = user_skill_inputs_levels.get(main, 1)
+    d_lvl = user_skill_inputs_levels.get(deputy, 1)
+    
+    # 1. Skills
+    m_skill = m_data.skill_speed(m_lvl, True, is_theia_flying)
+    d_skill = d_data.skill_speed(d_lvl, False, is_theia_flying)
+    
+    # 2. Big Talent (Main Only)
+    big_talent_val = m_data.big_talent_value
+    
+    # 3. Artifacts
+    artifact_bonus = 0.0
+    if neya_artifact_bonus > 0 and (m_data.has_lunaris or d_data.has_lunaris):
+        artifact_bonus = neya_artifact_bonus
+        
+    return m_skill, d_skill, big_talent_val, artifact_bonus
+
+def talent_pick(talents, fixed_speed, target_speed):
+    # Index of the talent speed closest to what the march is missing, None for heroes without talents
+    if talents is None:
+        return None
+    return talents.nearest(target_speed - fixed_speed)
+
+def talent_total(talents, fixed_speed, target_speed):
+    k = talent_pick(talents, fixed_speed, target_speed)
+    if k is None:
+        return fixed_speed
+    return fixed_speed + talents.speeds[k]
+
+def march_total_speed(main, deputy, user_skill_inputs_levels, target_speed=50.0, neya_artifact_bonus=0.0, is_theia_flying=False, talent_reserve=None):
+    # solve_for_march's total_speed, numbers only: no descriptions or MarchSetup
+    fixed_speed = sum(march_speed_parts(main, deputy, user_skill_inputs_levels, neya_artifact_bonus, is_theia_flying))
+    return talent_total(get_talent_index(main, talent_reserve), fixed_speed, target_speed)
+
+def solve_for_march(main, deputy, user_skill_inputs_levels, target_speed=50.0, neya_artifact_bonus=0.0, is_theia_flying=False, talent_reserve=None):
+    # talent_reserve: tree -> points the main must spend there whatever the speed (e.g. {"Pvp": 21})
+    m_data = get_hero(main)
+    d_data = get_hero(deputy)
+    
+    m_skill, d_skill, big_talent_val, artifact_bonus = march_speed_parts(main, deputy, user_skill_inputs_levels, neya_artifact_bonus, is_theia_flying)
+    big_talent_name = m_data.big_talent
+    
+    fixed_speed = m_skill + d_skill + big_talent_val + artifact_bonus
+    
+    # 4. Optimized Tree Search
+    talents = get_talent_index(main, talent_reserve)
+    k = talent_pick(talents, fixed_speed, target_speed)
+    if k is None:
+        # Generics have 0 talents
+        best_speed, tal_desc = 0.0, "None"
+    else:
+        best_speed = talents.speeds[k]
+        tal_desc = talents.descriptions[k]
+    
+    final_speed = fixed_speed + best_speed
+    
+    # Logic: Generic is assumed Cavalry for synergy purposes (or whatever user prefers)
+    # User said "favor real heroes".
+    # We will assume Generic matches type to avoid synergy penalty noise, since they are fillers.
+    is_synergy = (m_data.type == d_data.type)
+    
+    skill_breakdown = f"Main({m_skill}) + Dep({d_skill}) + {big_talent_name}({big_talent_val})"
+    if artifact_bonus > 0:
+        skill_breakdown += f" + Lunaris({artifact_bonus})"
+        
+    # Synergy Check
+    syn_type = specific_synergy(main, deputy)
+    
+    return MarchSetup(
+        main=main,
+        deputy=deputy,
+        total_speed=final_speed,
+        talent_config=tal_desc,
+        synergy_match=is_synergy,
+        skill_breakdown=skill_breakdown,
+        specific_synergy=syn_type
+    )
+
+def specific_synergy(main, deputy):
+    # "Synergy", "Anti-Synergy" or None from HERO_SYNERGIES
+    main_name, deputy_name = base_hero_name(main), base_hero_name(deputy)
+    syn_type = HERO_SYNERGIES.get(main_name, {}).get(deputy_name)
+    if not syn_type:
+        syn_type = HERO_SYNERGIES.get(deputy_name, {}).get(main_name) # Bidirectional check
+    return syn_type
+
+def synergy_points(syn_type, same_type):
+    points = SYNERGY_POINTS.get(syn_type, 0)
+    if not same_type:
+        points += TYPE_MISMATCH_POINTS
+    return points
+
+def plan_synergy(marches):
+    # Total synergy points of a set of MarchSetups
+    return sum(synergy_points(m.specific_synergy, m.synergy_match) for m in marches)
+
+def build_synergy_matrix(names):
+    # Synergy points per (main, deputy), laid out like PairScores.deviation. Doesn't depend on levels.
+    heroes = [get_hero(name) for name in names]
+    return [
+        [0 if i == j else synergy_points(specific_synergy(main, deputy), heroes[i].type == heroes[j].type) for j, deputy in enumerate(names)]
+        for i, main in enumerate(names)
+    ]
+
+def march_deviation(total_speed, target_speed):
+    # Step-weighted: anything more than 1.5% off target counts 10x
+    dev = abs(total_speed - target_speed)
+    if dev > 1.5:
+        return dev * 10
+    return dev
+
+# Pair score engine: row = main index, column = deputy index (diagonal unused)
+PairScores = namedtuple('PairScores', ['names', 'index', 'speed', 'deviation'])
+
+def build_pair_scores(names, user_skill_inputs_levels, target_speed=50.0, neya_artifact_bonus=0.0, is_theia_flying=False, talent_reserve=None):
+    n = len(names)
+    speed = [[0.0] * n for _ in range(n)]
+    deviation = [[0.0] * n for _ in range(n)]
+    
+    for i, main in enumerate(names):
+        for j, deputy in enumerate(names):
+            if i == j:
+                continue
+            # Numbers only, MarchSetups are built just for the plans that get shown
+            total = march_total_speed(main, deputy, user_skill_inputs_levels, target_speed, neya_artifact_bonus, is_theia_flying, talent_reserve)
+            speed[i][j] = total
+            deviation[i][j] = march_deviation(total, target_speed)
+            
+    index = {name: i for i, name in enumerate(names)}
+    return PairScores(names=list(names), index=index, speed=speed, deviation=deviation)
+
+def hero_score_state(name, user_skill_inputs_levels, neya_artifact_bonus=0.0, is_theia_flying=False):
+    # The inputs a hero brings to the fixed (non-talent) part of every march it is in
+    hero = get_hero(name)
+    return (
+        user_skill_inputs_levels.get(name, 1),
+        neya_artifact_bonus if hero.has_lunaris else 0.0,
+        is_theia_flying and hero.skill_speeds[0] != hero.skill_speeds[1],
+    )
+
+class PairScoreCache:
+    # Pair scores kept between runs. Each (main, deputy) entry remembers the two heroes' score states
+    # and the target (and talent reserve) it was scored at: a changed level (or the Lunaris bonus for Neya,
+    # flying for Theia) recomputes only that hero's row and column, a changed target or reserve only re-picks talents.
+    # build() gives the same PairScores as build_pair_scores.
+    # max_entries bounds a long-lived cache: past it, only the last build's pairs are kept.
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries
+        self._entries = {} # (main, deputy) -> [main state, deputy state, fixed speed, (target, reserve), speed, deviation]
+        self._lock = threading.Lock()
+        # Counts from the last build
+        self.recomputed = 0
+        self.retargeted = 0
+        self.reused = 0
+        
+    def build(self, names, user_skill_inputs_levels, target_speed=50.0, neya_artifact_bonus=0.0, is_theia_flying=False, talent_reserve=None):
+        talent_key = (target_speed, tuple(sorted(talent_reserve.items())) if talent_reserve else ())
+        states = {name: hero_score_state(name, user_skill_inputs_levels, neya_artifact_bonus, is_theia_flying) for name in names}
+        n = len(names)
+        speed = [[0.0] * n for _ in range(n)]
+        deviation = [[0.0] * n for _ in range(n)]
+        recomputed = retargeted = reused = 0
+        
+        with self._lock:
+            for i, main in enumerate(names):
+                talents = get_talent_index(main, talent_reserve)
+                for j, deputy in enumerate(names):
+                    if i == j:
+                        continue
+                    entry = self._entries.get((main, deputy))
+                    if entry is None or entry[0] != states[main] or entry[1] != states[deputy]:
+                        fixed = sum(march_speed_parts(main, deputy, user_skill_inputs_levels, neya_artifact_bonus, is_theia_flying))
+                        entry = [states[main], states[deputy], fixed, None, 0.0, 0.0]
+                        self._entries[(main, deputy)] = entry
+                        recomputed += 1
+                    elif entry[3] != talent_key:
+                        retargeted += 1
+                    else:
+                        reused += 1
+                        
+                    if entry[3] != talent_key:
+                        fixed = entry[2]
+                        total = talent_total(talents, fixed, target_speed)
+                        entry[3:] = [talent_key, total, march_deviation(total, target_speed)]
+                    speed[i][j] = entry[4]
+                    deviation[i][j] = entry[5]
+                    
+            self.recomputed, self.retargeted, self.reused = recomputed, retargeted, reused
+            if self.max_entries is not None and len(self._entries) > self.max_entries:
+                self._entries = {(main, deputy): self._entries[(main, deputy)] for main in names for deputy in names if main != deputy}
+            
+        index = {name: i for i, name in enumerate(names)}
+        return PairScores(names=list(names), index=index, speed=speed, deviation=deviation)
+
+def add_bench_slot(scores, bench_deviation=BENCH_DEVIATION):
+    # Virtual partner for odd rosters: the pair (bench, hero) means that hero sits out.
+    # The bench has to be searched as a forced main so it never ends up as someone's deputy, and passed
+    # to branch and bound as the bench (pair_lower_bounds), or its free pairs zero every hero's bound.
+    n = len(scores.names)
+    speed = [row + [0.0] for row in scores.speed] + [[0.0] * (n + 1)]
+    deviation = [row + [0.0] for row in scores.deviation] + [[bench_deviation] * n + [0.0]]
+    index = dict(scores.index)
+    index[BENCH_NAME] = n
+    return PairScores(names=scores.names + [BENCH_NAME], index=index, speed=speed, deviation=deviation)
+
+def hero_classes(names, user_skill_inputs_levels, neya_artifact_bonus=0.0, is_theia_flying=False, forced_mains=None):
+    # Class id per hero: heroes with identical stats and rules (all Generics, or e.g. two
+    # plain Pvp cavalry at the same level) share a class and are interchangeable in a matching.
+    if forced_mains is None:
+        forced_mains = set()
+    
+    synergy_names = set(HERO_SYNERGIES)
+    for partners in HERO_SYNERGIES.values():
+        synergy_names.update(partners)
+    
+    class_ids = {}
+    classes = []
+    for name in names:
+        forced = name in forced_mains
+        hero = get_hero(name)
+        if hero.is_generic:
+            signature = ("Generic", forced)
+        elif base_hero_name(name) in synergy_names:
+            # Named synergies make a hero unique
+            signature = (name,)
+        else:
+            lvl = user_skill_inputs_levels.get(name, 1)
+            signature = (
+                hero.type,
+                hero.trees,
+                hero.skill_speed(lvl, True, is_theia_flying),
+                hero.skill_speed(lvl, False, is_theia_flying),
+                hero.big_talent,
+                hero.has_lunaris and neya_artifact_bonus > 0,
+                forced
+            )
+        classes.append(class_ids.setdefault(signature, len(class_ids)))
+    return classes
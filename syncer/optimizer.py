@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, NamedTuple, Optional
+
+from .config import BENCH_NAME, MAX_CHECKS, TALENT_TREES_DEF, TOP_K_RESULTS
+from .marches import MarchSetup, PairScoreCache, add_bench_slot, build_pair_scores, build_synergy_matrix, hero_classes, march_deviation, plan_synergy, solve_for_march
+from .local_search import local_search_pairings
+from .matching import min_cost_pairing
+from .search import ParetoFront, TopKCollector, all_pairs_generator, bounded_pairs_generator, greedy_pairing, matching_key
+from .talents import TALENT_INDEX_BUILD_SECONDS, get_talent_index
+
+# Solver modes
+SOLVER_BRANCH_AND_BOUND = "branch_and_bound"
+SOLVER_ENUMERATE = "enumerate"
+SOLVER_EXACT = "exact"
+SOLVER_ANYTIME = "anytime"
+SOLVER_LOCAL_SEARCH = "local_search"
+# Every trade-off between total deviation and synergy points (plans on the Pareto front, not the top K)
+SOLVER_PARETO = "pareto"
+SOLVERS = (SOLVER_BRANCH_AND_BOUND, SOLVER_ENUMERATE, SOLVER_EXACT, SOLVER_ANYTIME, SOLVER_LOCAL_SEARCH, SOLVER_PARETO)
+# Solvers that run until their time budget instead of max_checks
+TIMED_SOLVERS = (SOLVER_ANYTIME, SOLVER_LOCAL_SEARCH)
+
+# How often (in enumerated combos) the progress callback fires
+PROGRESS_INTERVAL = 2000
+
+# Timed solvers: default wall-clock budget and how often (seconds) improved lists are pushed out
+ANYTIME_TIME_BUDGET = 0.5
+UPDATE_INTERVAL = 0.1
+
+class ConstraintError(ValueError):
+    # Inputs that can't produce any valid set of marches (duplicate pins, impossible forced mains)
+    pass
+
+@dataclass
+class OptimizeOptions:
+    neya_artifact_bonus: float = 0.0
+    is_theia_flying: bool = False
+    num_fillers: int = 0
+    forced_pairs: list[tuple[str, str]] = field(default_factory=list)
+    forced_mains: set[str] = field(default_factory=set)
+    solver: str = SOLVER_BRANCH_AND_BOUND
+    top_k: int = TOP_K_RESULTS
+    max_checks: int = MAX_CHECKS
+    # Seconds, counted from the start of optimize(). None = no limit (ANYTIME_TIME_BUDGET for the timed solvers)
+    time_budget: Optional[float] = None
+    # Top K lists: fewest marches any two plans must differ in (0 = near-copies allowed)
+    min_distance: int = 0
+    # Talent tree -> points every main with that tree must spend there whatever the speed (e.g. {"Pvp": 21})
+    talent_reserve: dict[str, int] = field(default_factory=dict)
+
+class MarchPlan(NamedTuple):
+    score: float
+    marches: list[MarchSetup]
+    benched: Optional[str]
+
+@dataclass
+class SearchStats:
+    # Where one optimize() call spent its time and what the search did.
+    # phases: seconds per phase in run order (talent_index, pair_matrix, search, sort, render,
+    # or cache_lookup for a ResultCache hit)
+    phases: dict[str, float] = field(default_factory=dict)
+    generated: int = 0 # matchings the search produced and scored
+    pruned: int = 0 # branch and bound subtrees skipped
+    duplicates: int = 0 # matchings already listed, e.g. the anytime solver's first answers found again by the search
+    too_close: int = 0 # matchings left out for a better listed one fewer than min_distance marches away
+    pair_scores_computed: int = 0
+    pair_scores_retargeted: int = 0 # OptimizerState hits that only re-picked talents for a new target
+    pair_scores_reused: int = 0
+    result_cache_hit: bool = False
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.phases.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        # JSON-ready, for offline profiling
+        data = asdict(self)
+        data["total_seconds"] = self.total_seconds
+        # One-off cost when the process started, not part of this call
+        data["talent_index_startup_seconds"] = TALENT_INDEX_BUILD_SECONDS
+        return data
+
+@dataclass
+class OptimizeResult:
+    plans: list[MarchPlan]
+    checked: int = 0
+    pruned: int = 0
+    hit_limit: bool = False
+    timed_out: bool = False
+    cancelled: bool = False
+    proven_optimal: bool = False
+    # Local search: the matching solver's optimum, a score no plan can beat (the top plan has it)
+    lower_bound: Optional[float] = None
+    # Served from a ResultCache instead of searched
+    cached: bool = False
+    # Pruned against an OptimizerState's previous plans; unless proven optimal (e.g. stopped at max_checks
+    # after fewer evaluations than a cold run), the list depends on them
+    warm_started: bool = False
+    stats: SearchStats = field(default_factory=SearchStats)
+
+class OptimizerState:
+    # Carried from one optimize() call to the next while a user tweaks inputs: pair scores are only
+    # recomputed where an input changed, and the previous top plans (by hero name) warm-start the search.
+    def __init__(self):
+        self.pair_scores = PairScoreCache()
+        self.previous: list[tuple[list[tuple[str, str]], Optional[str]]] = [] # (searched marches, benched)
+
+def effective_time_budget(options: OptimizeOptions) -> Optional[float]:
+    if options.time_budget is None and options.solver in TIMED_SOLVERS:
+        return ANYTIME_TIME_BUDGET
+    return options.time_budget
+
+def prepare_roster(roster: list[str], options: OptimizeOptions) -> tuple[list[tuple[str, str]], list[str], bool]:
+    # Validates the constraints and splits the roster into (pinned pairs, heroes left to pair, needs bench).
+    forced_pairs = list(options.forced_pairs)
+    forced_mains_only = set(options.forced_mains)
+
+    # 1. Validate Forced Pairs
+    all_pinned_flat = [h for pair in forced_pairs for h in pair]
+    overlap = set(all_pinned_flat).intersection(forced_mains_only)
+    if len(all_pinned_flat) != len(set(all_pinned_flat)) or overlap:
+        raise ConstraintError("Duplicate heroes used in Forced Pairings/Constraints!")
+
+    pinned_heroes = set(all_pinned_flat)
+    remaining_roster = [h for h in roster if h not in pinned_heroes]
+
+    # Add Generics to remaining roster
+    for i in range(options.num_fillers):
+        remaining_roster.append(f"Generic {i+1}")
+
+    # 2. Odd remainder: one hero sits out
+    use_bench = False
+    if len(remaining_roster) % 2 != 0:
+        # Priority drop Generics first
+        generics_in_roster = [h for h in remaining_roster if h.startswith("Generic")]
+
+        if generics_in_roster:
+            remaining_roster.remove(generics_in_roster[-1])
+        else:
+            # No generics: the search decides who sits out by pairing them with the bench
+            if all(h in forced_mains_only for h in remaining_roster):
+                raise ConstraintError("Constraints impossible to satisfy (e.g. forced Odd number of Main-Only heroes).")
+            use_bench = True
+
+    return forced_pairs, remaining_roster, use_bench
+
+def optimize(
+    roster: list[str],
+    levels: dict[str, int],
+    target: float,
+    options: Optional[OptimizeOptions] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    on_update: Optional[Callable[[list[MarchPlan]], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    state: Optional[OptimizerState] = None,
+) -> OptimizeResult:
+    # Best sets of marches for roster at the target speed, lowest deviation first.
+    # progress(checked, max_checks) is called periodically during enumeration.
+    # on_update(plans) gets the improved list while a timed solver runs (at most every UPDATE_INTERVAL).
+    # Setting cancel stops the search early; whatever was found so far comes back with result.cancelled.
+    # state (optional) keeps pair scores and the last plans between calls for incremental re-optimization.
+    started = time.perf_counter()
+    if options is None:
+        options = OptimizeOptions()
+    if options.solver not in SOLVERS:
+        raise ValueError(f"Unknown solver: {options.solver}")
+    if options.top_k < 1 or options.min_distance < 0:
+        raise ValueError(f"Need top_k >= 1 and min_distance >= 0, got {options.top_k} and {options.min_distance}")
+    
+    time_budget = effective_time_budget(options)
+    deadline = None if time_budget is None else started + time_budget
+    
+    def should_stop():
+        return (deadline is not None and time.perf_counter() > deadline) or (cancel is not None and cancel.is_set())
+    stoppable = deadline is not None or cancel is not None
+    
+    stats = SearchStats()
+    phase_start = started
+    def end_phase(name):
+        nonlocal phase_start
+        now = time.perf_counter()
+        stats.phases[name] = now - phase_start
+        phase_start = now
+
+    forced_pairs, remaining_roster, use_bench = prepare_roster(roster, options)
+    forced_mains_only = set(options.forced_mains)
+    # Indexes are built at import (see TALENT_INDEX_BUILD_SECONDS), this is the roster's lookups
+    # (a talent reserve builds and caches its own on first use)
+    unknown_trees = sorted(set(options.talent_reserve) - set(TALENT_TREES_DEF))
+    if unknown_trees:
+        raise ConstraintError(f"Unknown talent tree in reserve: {', '.join(unknown_trees)}")
+    for name in set(remaining_roster) | {m for m, _ in forced_pairs}:
+        try:
+            get_talent_index(name, options.talent_reserve)
+        except ValueError as e:
+            raise ConstraintError(f"{name}: {e}") from None
+    end_phase("talent_index")
+
+    fixed_results = [
+        solve_for_march(m, d, levels, target, options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve)
+        for m, d in forced_pairs
+    ]
+
+    # Base deviation from fixed results
+    fixed_dev = 0
+    for res in fixed_results:
+        fixed_dev += march_deviation(res.total_speed, target)
+
+    # 3. Score every (main, deputy) combination once, the search below only reads from the matrix
+    if state is not None:
+        scores = state.pair_scores.build(remaining_roster, levels, target, options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve)
+        stats.pair_scores_computed = state.pair_scores.recomputed
+        stats.pair_scores_retargeted = state.pair_scores.retargeted
+        stats.pair_scores_reused = state.pair_scores.reused
+    else:
+        scores = build_pair_scores(remaining_roster, levels, target, options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve)
+        stats.pair_scores_computed = len(remaining_roster) * (len(remaining_roster) - 1)
+    # Interchangeable heroes (e.g. the Generic fillers) are enumerated as one multiset
+    classes = hero_classes(scores.names, levels, options.neya_artifact_bonus, options.is_theia_flying, forced_mains_only)
+    forced_main_ids = {scores.index[h] for h in forced_mains_only if h in scores.index}
+
+    bench_id = None
+    if use_bench:
+        scores = add_bench_slot(scores)
+        bench_id = scores.index[BENCH_NAME]
+        classes.append(max(classes) + 1)
+        forced_main_ids.add(bench_id)
+
+    deviation = scores.deviation
+    roster_ids = sorted(range(len(scores.names)), key=lambda i: (classes[i], i))
+    end_phase("pair_matrix")
+    
+    def warm_start_cutoff():
+        # The previous top plans re-scored with the new inputs, for those that still fit the roster.
+        # With K different ones among them, no plan worse than the K-th can make the list: a cutoff that
+        # only skips what a cold search would drop anyway. None if there are fewer.
+        seed_scores = {}
+        all_ids = set(roster_ids)
+        for marches, benched in state.previous:
+            pair_list = [(scores.index.get(m), scores.index.get(d)) for m, d in marches]
+            if benched is not None:
+                pair_list.append((bench_id, scores.index.get(benched)))
+            flat = [h for pair in pair_list for h in pair]
+            if None in flat or len(flat) != len(all_ids) or set(flat) != all_ids:
+                continue
+            if any(d in forced_main_ids for _, d in pair_list):
+                continue
+            # Plans that were different may be the same matching now (e.g. two heroes at the same level)
+            seed_scores[matching_key(pair_list, classes)] = sum(deviation[m][d] for m, d in pair_list)
+        if len(seed_scores) < options.top_k:
+            return None
+        return sorted(seed_scores.values())[options.top_k - 1]
+
+    def build_plans(entries):
+        # Only the kept results are turned into displayable marches
+        plans = []
+        for total_deviation, pair_list in entries:
+            current_results = list(fixed_results) # Start with pinned
+            benched = None
+            for main, deputy in pair_list:
+                if main == bench_id:
+                    benched = scores.names[deputy]
+                    continue
+                current_results.append(solve_for_march(scores.names[main], scores.names[deputy], levels, target, options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve))
+            plans.append(MarchPlan(total_deviation, current_results, benched))
+        return plans
+
+    # 4. Search
+    # Best (deviation_score, pair_list) entries - pairs are (main, deputy) indices into the pair matrix
+    top_k = TopKCollector(options.top_k, options.min_distance)
+    pareto = options.solver == SOLVER_PARETO
+    result = OptimizeResult(plans=[], stats=stats)
+
+    if options.solver == SOLVER_EXACT:
+        found = min_cost_pairing(deviation, roster_ids, forced_main_ids)
+        if found is not None:
+            top_k.push(fixed_dev + found[0], found[1])
+        result.proven_optimal = True
+    else:
+        anytime = options.solver == SOLVER_ANYTIME
+        timed = options.solver in TIMED_SOLVERS
+        # Warm start: the old top K re-scored gives branch and bound a tight cutoff right away. The old plans
+        # never enter the list themselves, so a complete search returns exactly what a cold one would, ties
+        # included. Only for the plain top K searches that prune against the list: a front or a diverse list
+        # isn't bounded by the K-th score, and enumerate and local search don't prune.
+        seedable = options.solver in (SOLVER_BRANCH_AND_BOUND, SOLVER_ANYTIME) and options.min_distance == 0
+        seed_cutoff = warm_start_cutoff() if state is not None and seedable else None
+        result.warm_started = seed_cutoff is not None
+        # Timed searches can run into a listed matching again, those push with a dedup key.
+        # So does a diverse list, which compares keys for the distance.
+        keyed = timed or options.min_distance > 0
+        if anytime:
+            # Something to show right away: the greedy pairing, then the true optimum from the matching
+            # solver. Both are keyed so the full search below doesn't list them a second time.
+            for found in (greedy_pairing(roster_ids, deviation, forced_main_ids), min_cost_pairing(deviation, roster_ids, forced_main_ids)):
+                if found is not None:
+                    top_k.push(fixed_dev + found[0], found[1], matching_key(found[1], classes))
+            if on_update is not None and len(top_k):
+                on_update(build_plans(top_k.results()))
+        
+        search_stats = {"pruned": 0, "stopped": False}
+        if options.solver == SOLVER_ENUMERATE:
+            matchings = ((sum(deviation[m][d] for m, d in pair_list), pair_list) for pair_list in all_pairs_generator(roster_ids, forced_main_ids, classes))
+        elif options.solver == SOLVER_LOCAL_SEARCH:
+            # The matching solver's optimum is polynomial at any roster size (~1.5 s at 300 heroes): it's
+            # listed first, bounds every plan, and the kicks look for alternatives around it
+            found = min_cost_pairing(deviation, roster_ids, forced_main_ids)
+            optimum = None
+            if found is not None:
+                optimum = found[1]
+                result.lower_bound = fixed_dev + found[0]
+                top_k.push(fixed_dev + found[0], optimum, matching_key(optimum, classes))
+            matchings = local_search_pairings(deviation, roster_ids, forced_main_ids, stats=search_stats, should_stop=should_stop if stoppable else None, initial=optimum)
+        elif pareto:
+            # Branch and bound on both objectives: a subtree goes once the front has a plan with at least
+            # its best reachable synergy and less deviation than it can get down to
+            front = ParetoFront()
+            fixed_syn = plan_synergy(fixed_results)
+            synergy = build_synergy_matrix(scores.names[:bench_id] if use_bench else scores.names)
+            if use_bench:
+                synergy = [row + [0] for row in synergy] + [[0] * len(scores.names)]
+            # The least-deviation end of the front up front, so low-synergy subtrees are cut right away
+            found = min_cost_pairing(deviation, roster_ids, forced_main_ids)
+            if found is not None:
+                front.push(fixed_dev + found[0], fixed_syn + sum(synergy[m][d] for m, d in found[1]), found[1])
+            matchings = bounded_pairs_generator(roster_ids, deviation, lambda upper: front.max_deviation(fixed_syn + upper) - fixed_dev, forced_main_ids, search_stats, classes, should_stop if stoppable else None, synergy, bench_id)
+        else:
+            if seed_cutoff is None:
+                cutoff = lambda: top_k.worst_score() - fixed_dev
+            else:
+                cutoff = lambda: min(top_k.worst_score() - fixed_dev, seed_cutoff)
+            matchings = bounded_pairs_generator(roster_ids, deviation, cutoff, forced_main_ids, search_stats, classes, should_stop if stoppable else None, bench=bench_id)
+
+        count_eval = 0
+        improved = False
+        last_update = time.perf_counter()
+        for partial_deviation, pair_list in matchings:
+            if pareto:
+                front.push(fixed_dev + partial_deviation, fixed_syn + sum(synergy[m][d] for m, d in pair_list), pair_list)
+            # Most matchings don't make the list: score check first, the dedup key only for those that might
+            if keyed and top_k.accepts(fixed_dev + partial_deviation):
+                improved |= top_k.push(fixed_dev + partial_deviation, pair_list, matching_key(pair_list, classes))
+                if timed and improved and on_update is not None and time.perf_counter() - last_update >= UPDATE_INTERVAL:
+                    on_update(build_plans(top_k.results()))
+                    improved = False
+                    last_update = time.perf_counter()
+            elif not keyed and not pareto:
+                top_k.push(fixed_dev + partial_deviation, pair_list)
+
+            count_eval += 1
+            if progress is not None and count_eval % PROGRESS_INTERVAL == 0 and count_eval < options.max_checks:
+                progress(count_eval, options.max_checks)
+            if not timed and count_eval > options.max_checks:
+                result.hit_limit = True
+                break
+            if stoppable and should_stop():
+                search_stats["stopped"] = True
+                break
+
+        result.checked = count_eval
+        result.pruned = search_stats["pruned"]
+        result.cancelled = search_stats["stopped"] and cancel is not None and cancel.is_set()
+        result.timed_out = search_stats["stopped"] and not result.cancelled
+        # Running a complete search to the end proves the whole list (or front); local search never knows
+        complete = options.solver != SOLVER_LOCAL_SEARCH
+        result.proven_optimal = complete and not search_stats["stopped"] and not result.hit_limit
+        stats.generated = count_eval
+        stats.pruned = search_stats["pruned"]
+    stats.duplicates = top_k.duplicates
+    stats.too_close = top_k.too_close
+    end_phase("search")
+
+    if not len(front if pareto else top_k):
+        if result.cancelled or result.timed_out:
+            return result
+        raise ConstraintError("Constraints impossible to satisfy (e.g. forced Odd number of Main-Only heroes).")
+
+    # 5. Best (lowest deviation) first; a front goes from least deviation to most synergy
+    if pareto:
+        entries = [(score, pair_list) for score, _, pair_list in front.results()]
+    else:
+        entries = top_k.results()
+    end_phase("sort")
+    result.plans = build_plans(entries)
+    if state is not None and not result.cancelled:
+        state.previous = [
+            ([(scores.names[m], scores.names[d]) for m, d in pair_list if m != bench_id], plan.benched)
+            for (_, pair_list), plan in zip(entries, result.plans)
+        ]
+    end_phase("render")
+    return result
@@ -0,0 +1,371 @@
+import heapq
+import math
+from bisect import bisect_left, insort
+
+def canonical_pair_key(first, partner, flipped, classes, min_key):
+    # With classes given (items ordered by class), a matching is emitted only with its pairs in
+    # non-decreasing (first class, partner class, flipped) order, so each multiset appears once.
+    # Returns the key to pass down, or None if this pair would repeat an earlier matching.
+    if classes is None:
+        return ()
+    if flipped and classes[first] == classes[partner]:
+        return None
+    key = (classes[first], classes[partner], flipped)
+    if min_key and key < min_key:
+        return None
+    return key
+
+def all_pairs_generator(items, forced_mains=None, classes=None, min_key=()):
+    if forced_mains is None:
+        forced_mains = set()
+
+    if len(items) < 2:
+        yield []
+        return
+
+    first = items[0]
+    rest = items[1:]
+    tried_classes = set()
+    
+    for i, partner in enumerate(rest):
+        # Interchangeable partners give the same matchings, try one per class
+        if classes is not None:
+            if classes[partner] in tried_classes:
+                continue
+            tried_classes.add(classes[partner])
+            
+        pair = (first, partner)
+        remaining = rest[:i] + rest[i+1:]
+        
+        # Check: Is partner allowed to be deputy? (i.e. not in forced_mains)
+        if partner not in forced_mains:
+            key = canonical_pair_key(first, partner, False, classes, min_key)
+            if key is not None:
+                for solution in all_pairs_generator(remaining, forced_mains, classes, key):
+                    yield [pair] + solution
+            
+        # Check: Is first allowed to be deputy?
+        if first not in forced_mains:
+            key = canonical_pair_key(first, partner, True, classes, min_key)
+            if key is not None:
+                pair_flipped = (partner, first)
+                for solution in all_pairs_generator(remaining, forced_mains, classes, key):
+                    yield [pair_flipped] + solution
+
+def pair_lower_bounds(deviation, roster_ids, forced_mains=None, bench=None):
+    # Admissible bound per hero: half of the cheapest march it could be part of.
+    # Any pair costs at least the sum of its two heroes' halves.
+    # bench: the bench slot of an odd roster (see add_bench_slot). Sitting out costs nothing, which would
+    # make every hero's half 0, so heroes only count real partners and the bench gets minus the largest
+    # half of a hero it could take: (bench, h) still costs at least the two halves, and since exactly one
+    # hero sits out the bound stays as tight as for an even roster.
+    if forced_mains is None:
+        forced_mains = set()
+    
+    bounds = {}
+    for i in roster_ids:
+        if i == bench:
+            continue
+        best = float("inf")
+        for j in roster_ids:
+            if j == i or j == bench:
+                continue
+            if j not in forced_mains:
+                best = min(best, deviation[i][j])
+            if i not in forced_mains:
+                best = min(best, deviation[j][i])
+        if best == float("inf") and bench is not None:
+            best = 0.0 # only the bench left for it: sits out whatever
+        bounds[i] = best / 2
+    if bench is not None and bench in roster_ids:
+        bounds[bench] = -max((bounds[h] for h in bounds if h not in forced_mains), default=0.0)
+    return bounds
+
+# Slack for float drift between the running bound and summed scores
+PRUNE_EPSILON = 1e-6
+
+def pair_upper_bounds(values, roster_ids, forced_mains=None):
+    # pair_lower_bounds for a score to maximise: half of the best pair value each hero could get
+    negated = pair_lower_bounds([[-v for v in row] for row in values], roster_ids, forced_mains)
+    return {h: -b for h, b in negated.items()}
+
+def bounded_pairs_generator(items, deviation, cutoff, forced_mains=None, stats=None, classes=None, should_stop=None, synergy=None, bench=None):
+    # Same enumeration order (and class symmetry handling) as all_pairs_generator, yielding (deviation, pair_list).
+    # cutoff() returns the score a matching must beat to still matter (e.g. the current K-th best);
+    # subtrees whose partial deviation plus the remaining lower bound exceed it are skipped.
+    # With a synergy matrix (higher is better) the cutoff depends on it: cutoff(upper) gets the most
+    # synergy any matching in the subtree could still reach (see ParetoFront.max_deviation).
+    # Stops early once should_stop() returns True (time budget, cancellation), setting stats["stopped"].
+    # bench: the bench slot's id for odd rosters, for tighter bounds (pair_lower_bounds).
+    #
+    # Iterative depth-first search over preallocated per-depth arrays, so the inner loop builds no lists
+    # or sets: pair tuples come from a table made up front and pair_list is ONE list, overwritten in place
+    # and yielded again for every matching. Copy it to keep it (TopKCollector.push does). What's left per
+    # matching is the yielded (cost, pair_list) tuple and its cost float (python -m syncer.bench alloc).
+    if forced_mains is None:
+        forced_mains = set()
+    if stats is None:
+        stats = {}
+    stats.setdefault("pruned", 0)
+    stats.setdefault("stopped", False)
+    
+    items = list(items)
+    n = len(items)
+    if n < 2:
+        yield 0.0, []
+        return
+    
+    # Everything by position in items
+    lower_bounds = pair_lower_bounds(deviation, items, forced_mains, bench)
+    bound = [lower_bounds[h] for h in items]
+    dev = [[deviation[i][j] for j in items] for i in items]
+    pair_table = [[(i, j) for j in items] for i in items]
+    forced = [h in forced_mains for h in items]
+    has_classes = classes is not None
+    cls = [classes[h] for h in items] if has_classes else list(range(n))
+    # canonical_pair_key as one int: (first class, partner class, flipped) in the same order
+    class_count = max(cls) + 1
+    has_synergy = synergy is not None
+    if has_synergy:
+        upper_bounds = pair_upper_bounds(synergy, items, forced_mains)
+        syn_bound = [upper_bounds[h] for h in items]
+        syn = [[synergy[i][j] for j in items] for i in items]
+    
+    half = n // 2
+    pair_list = [None] * half
+    used = [False] * n
+    first = [0] * half      # position of the depth's first hero
+    partner = [0] * half    # position of its current partner
+    flipped = [0] * half    # 0: first is main, 1: partner is main
+    last_class = [-1] * half
+    partial = [0.0] * half
+    remaining = [0.0] * half
+    min_key = [-1] * half
+    partial_syn = [0] * half
+    remaining_syn = [0.0] * half
+    pruned = stats["pruned"]
+    
+    d = 0
+    used[0] = True
+    partner[0], flipped[0] = 0, 1
+    remaining[0] = sum(bound)
+    if has_synergy:
+        remaining_syn[0] = sum(syn_bound)
+    while True:
+        f = first[d]
+        if flipped[d] == 0:
+            flipped[d] = 1
+            p = partner[d]
+        else:
+            # Next unused partner; interchangeable ones are next to each other, try one per class
+            p = partner[d] + 1
+            while p < n and (used[p] or cls[p] == last_class[d]):
+                p += 1
+            if p >= n:
+                # Depth exhausted: back to the previous one and free its partner
+                used[f] = False
+                d -= 1
+                if d < 0:
+                    break
+                used[partner[d]] = False
+                continue
+            partner[d], flipped[d], last_class[d] = p, 0, cls[p]
+            
+        if flipped[d]:
+            main, deputy = p, f
+        else:
+            main, deputy = f, p
+        if forced[deputy]:
+            continue
+        if has_classes:
+            if flipped[d] and cls[f] == cls[p]:
+                continue
+            key = (cls[f] * class_count + cls[p]) * 2 + flipped[d]
+            if key < min_key[d]:
+                continue
+        else:
+            key = -1
+            
+        cost = partial[d] + dev[main][deputy]
+        sub_bound = remaining[d] - bound[f] - bound[p]
+        if has_synergy:
+            gain = partial_syn[d] + syn[main][deputy]
+            sub_syn = remaining_syn[d] - syn_bound[f] - syn_bound[p]
+            limit = cutoff(gain + sub_syn)
+        else:
+            limit = cutoff()
+        if cost + sub_bound > limit + PRUNE_EPSILON:
+            pruned += 1
+            continue
+        if should_stop is not None and should_stop():
+            stats["pruned"] = pruned
+            stats["stopped"] = True
+            return
+            
+        pair_list[d] = pair_table[main][deputy]
+        if d + 1 == half:
+            stats["pruned"] = pruned
+            yield cost, pair_list
+            continue
+        
+        # Down one depth: its first hero is the next unused one
+        used[p] = True
+        d += 1
+        nf = f + 1
+        while used[nf]:
+            nf += 1
+        used[nf] = True
+        first[d], partner[d], flipped[d], last_class[d] = nf, nf, 1, -1
+        partial[d], remaining[d], min_key[d] = cost, sub_bound, key
+        if has_synergy:
+            partial_syn[d], remaining_syn[d] = gain, sub_syn
+        
+    stats["pruned"] = pruned
+
+def greedy_pairing(items, deviation, forced_mains=None):
+    # Quick seed: repeatedly take the cheapest allowed march among the heroes left.
+    # Returns (total_deviation, pair_list), or None if it paints itself into a corner.
+    if forced_mains is None:
+        forced_mains = set()
+    
+    left = list(items)
+    total = 0.0
+    pair_list = []
+    while len(left) >= 2:
+        best = None
+        for main in left:
+            for deputy in left:
+                if deputy == main or deputy in forced_mains:
+                    continue
+                if best is None or deviation[main][deputy] < deviation[best[0]][best[1]]:
+                    best = (main, deputy)
+        if best is None:
+            return None
+        total += deviation[best[0]][best[1]]
+        pair_list.append(best)
+        left.remove(best[0])
+        left.remove(best[1])
+    return total, pair_list
+
+def matching_key(pair_list, classes):
+    # Same key for matchings that only differ by swapping interchangeable heroes:
+    # the sorted (main class, deputy class) pairs, each packed into one int
+    n = len(classes)
+    return tuple(sorted(classes[main] * n + classes[deputy] for main, deputy in pair_list))
+
+def march_distance(key_a, key_b):
+    # Marches of one matching the other doesn't have (main/deputy order counts), from two matching_keys.
+    # Both are sorted, so one merge pass. Swapping two deputies gives 2, flipping one march 1.
+    i = j = shared = 0
+    while i < len(key_a) and j < len(key_b):
+        if key_a[i] == key_b[j]:
+            shared += 1
+            i += 1
+            j += 1
+        elif key_a[i] < key_b[j]:
+            i += 1
+        else:
+            j += 1
+    return len(key_a) - shared
+
+class TopKCollector:
+    # Keeps only the k lowest-score matchings seen so far. Matchings are stored as flat
+    # (main, deputy, main, deputy, ...) index tuples; ties keep the earlier one, like a stable sort.
+    # min_distance > 0 also keeps the list diverse: no two kept matchings are fewer than that many
+    # marches apart (march_distance). Within that distance only the better one stays, decided as
+    # matchings arrive, so pushes need a key then. The cutoff never loosens: once the list has been
+    # full, a matching no better than its K-th score is dropped even if a newcomer has since pushed
+    # close ones out. That keeps branch and bound pruning, and the list may end up shorter than K.
+    def __init__(self, k, min_distance=0):
+        self.k = k
+        self.min_distance = min_distance
+        self._heap = [] # max-heap via (-score, -seq, flat_pairs, key)
+        self._seq = 0
+        self._keys = set()
+        self._worst = float("inf") # K-th score once the list has been full; cached so cutoff checks don't allocate
+        self.duplicates = 0 # pushes skipped because their key was already kept
+        self.too_close = 0 # pushes skipped for a better kept matching within min_distance
+        
+    def __len__(self):
+        return len(self._heap)
+        
+    def worst_score(self):
+        return self._worst
+    
+    def accepts(self, score):
+        # Cheap pre-check: would push() keep a matching with this score (dedup keys aside)?
+        return score < self._worst
+        
+    def push(self, score, pair_list, key=None):
+        # Returns True if the matching made the list. A key (see matching_key) already kept is skipped,
+        # for matchings that can be found twice (e.g. a seed the full search runs into again).
+        # pair_list is copied only when kept, so callers may pass a list they reuse.
+        if not score < self._worst:
+            return False
+        if key is not None and key in self._keys:
+            self.duplicates += 1
+            return False
+        if self.min_distance:
+            close = []
+            for e in self._heap:
+                if march_distance(key, e[3]) < self.min_distance:
+                    if -e[0] <= score:
+                        self.too_close += 1
+                        return False
+                    close.append(e)
+            if close:
+                # The newcomer beats every kept matching near it, those make room
+                self._heap = [e for e in self._heap if e not in close]
+                heapq.heapify(self._heap)
+                self._keys.difference_update(e[3] for e in close)
+        self._seq += 1
+        entry = (-score, -self._seq, tuple(h for pair in pair_list for h in pair), key)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            evicted = heapq.heapreplace(self._heap, entry)
+            self._keys.discard(evicted[3])
+        if key is not None:
+            self._keys.add(key)
+        if len(self._heap) == self.k:
+            self._worst = -self._heap[0][0]
+        return True
+            
+    def results(self):
+        # Best first, as (score, [(main, deputy), ...])
+        ranked = sorted(self._heap, key=lambda e: (-e[0], -e[1]))
+        return [(-neg_score, list(zip(flat[0::2], flat[1::2]))) for neg_score, _, flat, _ in ranked]
+
+class ParetoFront:
+    # Non-dominated matchings for two objectives: lower deviation and higher synergy. Synergy totals
+    # are small integers, so the front holds the best matching per total, for as long as no higher
+    # total has a deviation as low. Ties keep the earlier matching, like TopKCollector.
+    def __init__(self):
+        self._best = {} # synergy total -> (deviation, flat_pairs)
+        self._totals = [] # totals on the front, ascending; their deviations ascend too
+        
+    def __len__(self):
+        return len(self._totals)
+        
+    def max_deviation(self, synergy_upper):
+        # Deviation a matching with at most synergy_upper synergy has to beat to join the front
+        k = bisect_left(self._totals, math.ceil(synergy_upper - PRUNE_EPSILON))
+        if k == len(self._totals):
+            return float("inf")
+        return self._best[self._totals[k]][0]
+        
+    def push(self, deviation, synergy, pair_list):
+        # Returns True if the matching joined the front; those it now dominates are dropped
+        if not deviation < self.max_deviation(synergy):
+            return False
+        dominated = [s for s in self._totals if s <= synergy and self._best[s][0] >= deviation]
+        for s in dominated:
+            del self._best[s]
+            self._totals.remove(s)
+        self._best[synergy] = (deviation, tuple(h for pair in pair_list for h in pair))
+        insort(self._totals, synergy)
+        return True
+        
+    def results(self):
+        # Lowest deviation (and lowest synergy) first, as (score, synergy, [(main, deputy), ...])
+        return [(self._best[s][0], s, list(zip(self._best[s][1][0::2], self._best[s][1][1::2]))) for s in self._totals]
@@ -0,0 +1,339 @@
+# HTTP/JSON solver service for bots and scripts: one job in the batch format in, ranked plans out.
+#
+#   python -m syncer.server serve --port 8080 --workers 4
+#   curl -d '{"heroes": ["Neya", "Urag", "Emrys", "Tobin"], "levels": {"Urag": 3}, "target": 50}' http://127.0.0.1:8080/optimize
+#   python -m syncer.server load http://127.0.0.1:8080 rosters.jsonl --requests 500 --concurrency 16
+#
+# POST /optimize takes one job (see jobs.py) and answers with run_job_dict's result: 200 with the plans,
+# 400 for bad input, 503 when too many different jobs are already queued. ?stats=1 adds the phase timings.
+# GET /status reports request counters and p50/p99 of the last LATENCY_WINDOW requests.
+#
+# Jobs run on a fixed pool of worker processes started after the hero table and talent indexes are built,
+# so a request never pays for them; each worker also keeps its pair scores between requests. Identical
+# jobs (same input_hash as the result cache) that arrive while one is being solved wait for that one
+# instead of being solved again.
+#
+# load replays jobs against a running server from concurrent clients and reports p50/p99 latency.
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from .batch import ParseError, read_records
+from .cache import ResultCache, input_hash
+from .heroes import HEROES
+from .jobs import JOB_INPUT_ERRORS, job_error, job_from_dict, run_job_dict
+from .marches import PairScoreCache
+from .optimizer import OptimizerState
+from .talents import get_talent_index
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+# Different jobs queued or running at once before new ones get a 503
+DEFAULT_MAX_PENDING = 64
+# Request bodies beyond this are refused (a 100-hero job is a few KiB)
+MAX_BODY_BYTES = 1 << 20
+# Recent requests /status computes its latency percentiles over
+LATENCY_WINDOW = 1000
+# Pair scores a worker keeps between requests (a 100-hero pooled roster is 9,900)
+PAIR_SCORE_CACHE_MAX_ENTRIES = 50000
+
+# Per worker process: pair scores shared by every job the worker runs, and one ResultCache per path
+_pair_scores = PairScoreCache(PAIR_SCORE_CACHE_MAX_ENTRIES)
+_caches: dict[str, ResultCache] = {}
+
+def _warm_worker() -> int:
+    # Talent indexes are built on import; touching them makes sure a fresh worker has them before its first job
+    for hero in HEROES:
+        get_talent_index(hero.name)
+    return os.getpid()
+
+def _solve(data: dict[str, Any], cache_path: Optional[str] = None, include_stats: bool = False) -> dict[str, Any]:
+    cache = None
+    if cache_path is not None:
+        if cache_path not in _caches:
+            _caches[cache_path] = ResultCache(cache_path)
+        cache = _caches[cache_path]
+    # Only the pair scores are shared: warm-start plans from other rosters could change a capped search
+    state = OptimizerState()
+    state.pair_scores = _pair_scores
+    return run_job_dict(data, cache=cache, include_stats=include_stats, state=state)
+
+def percentile(values: list[float], q: float) -> Optional[float]:
+    # Nearest-rank percentile of sorted values, None if there are none
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))]
+
+class SolverService:
+    # The server without the HTTP: a process pool, coalescing of identical jobs and the counters.
+    def __init__(self, workers: Optional[int] = None, max_pending: int = DEFAULT_MAX_PENDING, cache_path: Optional[str] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.cache_path = cache_path
+        self._pool = self._new_pool()
+        self._pending: dict[str, Future] = {} # job key -> the solve every identical request waits on
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.started = time.time()
+        # requests = solved + coalesced + rejected + invalid, plus any that failed to reach the pool
+        self.requests = 0
+        self.solved = 0 # sent to the pool (a ResultCache hit there counts too)
+        self.coalesced = 0
+        self.rejected = 0
+        self.invalid = 0
+        self.failed = 0 # answered 500 because a worker failed
+        self.pool_restarts = 0
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def _submit(self, payload: dict[str, Any], include_stats: bool) -> Future:
+        # Called with the lock held
+        try:
+            return self._pool.submit(_solve, payload, self.cache_path, include_stats)
+        except BrokenProcessPool:
+            # A worker died and took the pool with it: start a fresh one for this and later requests
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            self.pool_restarts += 1
+            return self._pool.submit(_solve, payload, self.cache_path, include_stats)
+
+    def warm_up(self) -> None:
+        # Start every worker now rather than on the first requests
+        for future in [self._pool.submit(_warm_worker) for _ in range(self.workers)]:
+            future.result()
+
+    def close(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+    def solve(self, data: Any, include_stats: bool = False) -> tuple[int, dict[str, Any]]:
+        # (HTTP status, JSON body) for one job
+        start = time.perf_counter()
+        job_id = str(data.get("id", "")) if isinstance(data, dict) else ""
+        try:
+            job = job_from_dict(data)
+        except JOB_INPUT_ERRORS as e:
+            with self._lock:
+                self.requests += 1
+                self.invalid += 1
+            return self._finish(start, 400, job_error(job_id, e))
+        # The id is the only field that doesn't change the answer
+        key = f"{input_hash(job.heroes, job.levels, job.target, job.options)}:{int(include_stats)}"
+
+        with self._lock:
+            self.requests += 1
+            future = self._pending.get(key)
+            if future is not None:
+                self.coalesced += 1
+            elif len(self._pending) >= self.max_pending:
+                self.rejected += 1
+                return self._finish(start, 503, {"id": job_id, "ok": False, "error": "Server busy, try again later"})
+            else:
+                payload = {k: v for k, v in data.items() if k != "id"}
+                try:
+                    future = self._submit(payload, include_stats)
+                except Exception as e: # e.g. shutting down: still answer rather than drop the connection
+                    self.failed += 1
+                    return self._finish(start, 500, {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+                self._pending[key] = future
+                self.solved += 1
+        future.add_done_callback(lambda f: self._forget(key, f))
+
+        try:
+            result = future.result()
+        except Exception as e: # a worker crashed: report it rather than drop the connection
+            with self._lock:
+                self.failed += 1
+            return self._finish(start, 500, {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"})
+        return self._finish(start, 200 if result["ok"] else 400, {**result, "id": job_id})
+
+    def _forget(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def _finish(self, start: float, status: int, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        self._latencies.append(time.perf_counter() - start)
+        return status, body
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            pending = len(self._pending)
+        p50, p99 = percentile(latencies, 50), percentile(latencies, 99)
+        return {
+            "ok": True,
+            "uptime_s": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "requests": self.requests,
+            "solved": self.solved,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "pool_restarts": self.pool_restarts,
+            "p50_ms": None if p50 is None else round(p50 * 1000, 2),
+            "p99_ms": None if p99 is None else round(p99 * 1000, 2),
+        }
+
+class SolverRequestHandler(BaseHTTPRequestHandler):
+    server: SolverHTTPServer
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/status":
+            self._send(404, {"ok": False, "error": "Not found"})
+            return
+        self._send(200, self.server.service.status())
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/optimize":
+            self._send(404, {"ok": False, "error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            self._send(413, {"ok": False, "error": f"Body must be 0-{MAX_BODY_BYTES} bytes"})
+            return
+        try:
+            data = json.loads(self.rfile.read(length) or b"{}")
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            self._send(400, {"ok": False, "error": f"Bad JSON: {e}"})
+            return
+        include_stats = parse_qs(url.query).get("stats", ["0"])[0].lower() in ("1", "true", "yes")
+        self._send(*self.server.service.solve(data, include_stats))
+
+    def _send(self, status: int, body: dict[str, Any]) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class SolverHTTPServer(ThreadingHTTPServer):
+    # One thread per connection; they only parse, wait and answer, the solving happens in the pool
+    daemon_threads = True
+    # Connections waiting to be accepted; the default of 5 drops bursts from concurrent clients
+    request_queue_size = 128
+
+    def __init__(self, address: tuple[str, int], service: SolverService, verbose: bool = False):
+        super().__init__(address, SolverRequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+def load_test(url: str, jobs: list[dict[str, Any]], requests: int = 200, concurrency: int = 16, timeout: float = 60.0) -> dict[str, Any]:
+    # Posts requests jobs (cycling through the list) from concurrency clients at once
+    endpoint = url.rstrip("/") + "/optimize"
+
+    def post(i: int) -> tuple[float, Optional[int]]:
+        body = json.dumps(jobs[i % len(jobs)]).encode()
+        request = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except OSError: # refused, reset or timed out
+            status = None
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(post, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(t for t, _ in samples)
+    statuses: dict[str, int] = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "url": url,
+        "requests": requests,
+        "concurrency": concurrency,
+        "distinct_jobs": len(jobs),
+        "wall_s": round(wall, 3),
+        "requests_per_sec": round(requests / wall, 1) if wall > 0 else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2),
+        "statuses": statuses,
+    }
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m syncer.server", description="HTTP/JSON solver service.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Answer POST /optimize until interrupted")
+    serve.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT}, 0 picks a free one)")
+    serve.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    serve.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING, help="Different jobs queued or running before new ones get a 503")
+    serve.add_argument("--cache", metavar="PATH", help="SQLite result cache to reuse and fill (default: no cache)")
+    serve.add_argument("-v", "--verbose", action="store_true", help="Log every request to stderr")
+
+    load = commands.add_parser("load", help="Send jobs to a running server from concurrent clients, print p50/p99 latency")
+    load.add_argument("url", help="Server address, e.g. http://127.0.0.1:8080")
+    load.add_argument("input", help="JSONL or CSV file of jobs (as for syncer.batch), or - for JSONL on stdin")
+    load.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    load.add_argument("--requests", type=int, default=200, help="Requests to send, cycling through the jobs")
+    load.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    load.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for one answer")
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+        src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+        try:
+            jobs = [record for _, record in read_records(src, fmt) if not isinstance(record, ParseError)]
+        finally:
+            if src is not sys.stdin:
+                src.close()
+        if not jobs:
+            print("No jobs to send", file=sys.stderr)
+            return 1
+        report = load_test(args.url, jobs, args.requests, args.concurrency, args.timeout)
+        print(json.dumps(report))
+        return 0 if report["statuses"].get("200", 0) == args.requests else 1
+
+    service = SolverService(args.workers, args.max_pending, args.cache)
+    service.warm_up()
+    httpd = SolverHTTPServer((args.host, args.port), service, args.verbose)
+    host, port = httpd.server_address[:2]
+    print(f"Serving on http://{host}:{port} with {service.workers} workers", file=sys.stderr, flush=True)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# Multi-target sweep: the best achievable score for every target speed on a grid, in one pass.
+# Needs NumPy, so it is not imported by the syncer package itself.
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .config import BENCH_NAME
+from .marches import PairScores, add_bench_slot, march_speed_parts
+from .matching import min_cost_pairing
+from .optimizer import OptimizeOptions, prepare_roster
+from .talents import get_talent_index
+
+# Default grid: 30-80% in 0.5% steps
+SWEEP_START = 30.0
+SWEEP_STOP = 80.0
+SWEEP_STEP = 0.5
+
+class SweepPoint(NamedTuple):
+    target: float
+    score: float
+    pairs: list[tuple[str, str]]
+    benched: Optional[str]
+
+def target_grid(start: float = SWEEP_START, stop: float = SWEEP_STOP, step: float = SWEEP_STEP) -> np.ndarray:
+    return np.round(np.arange(start, stop + step / 2, step), 6)
+
+def pair_speed_table(names: list[str], levels: dict[str, int], targets: np.ndarray, neya_artifact_bonus: float = 0.0, is_theia_flying: bool = False, talent_reserve: Optional[dict[str, int]] = None) -> np.ndarray:
+    # speeds[t, main, deputy] as solve_for_march would compute it at targets[t].
+    # Skills, big talent and artifact don't depend on the target, only the talent pick does.
+    n = len(names)
+    speeds = np.zeros((len(targets), n, n))
+    for i, main in enumerate(names):
+        fixed = np.array([
+            sum(march_speed_parts(main, deputy, levels, neya_artifact_bonus, is_theia_flying)) if j != i else 0.0
+            for j, deputy in enumerate(names)
+        ])
+        talents = get_talent_index(main, talent_reserve)
+        if talents is None:
+            speeds[:, i, :] = fixed[None, :]
+            continue
+            
+        # Vectorized TalentIndex.nearest: the closest speed is one of the two around the insertion point
+        options = np.array(talents.speeds)
+        costs = np.array(talents.costs)
+        gap = targets[:, None] - fixed[None, :]
+        pos = np.searchsorted(options, gap)
+        lo = np.clip(pos - 1, 0, len(options) - 1)
+        hi = np.clip(pos, 0, len(options) - 1)
+        d_lo = np.abs(options[lo] - gap)
+        d_hi = np.abs(options[hi] - gap)
+        pick = np.where((d_hi < d_lo) | ((d_hi == d_lo) & (costs[hi] < costs[lo])), hi, lo)
+        speeds[:, i, :] = fixed[None, :] + options[pick]
+    return speeds
+
+def deviation_table(speeds: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    # Vectorized march_deviation
+    dev = np.abs(speeds - targets[:, None, None])
+    return np.where(dev > 1.5, dev * 10, dev)
+
+def sweep_targets(roster: list[str], levels: dict[str, int], targets: Optional[np.ndarray] = None, options: Optional[OptimizeOptions] = None) -> list[SweepPoint]:
+    # Exact best plan at every target. The pair tables are built once for the whole grid,
+    # each target then only costs one min-cost matching.
+    if options is None:
+        options = OptimizeOptions()
+    if targets is None:
+        targets = target_grid()
+    targets = np.asarray(targets, dtype=float)
+
+    forced_pairs, remaining_roster, use_bench = prepare_roster(roster, options)
+    pinned = [h for pair in forced_pairs for h in pair]
+    names = remaining_roster + pinned
+    index = {name: i for i, name in enumerate(names)}
+
+    speeds = pair_speed_table(names, levels, targets, options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve)
+    deviations = deviation_table(speeds, targets)
+
+    # Pinned marches are the same pairs at every target
+    fixed_dev = np.zeros(len(targets))
+    for m, d in forced_pairs:
+        fixed_dev += deviations[:, index[m], index[d]]
+
+    n = len(remaining_roster)
+    forced_main_ids = {index[h] for h in options.forced_mains if h in index and index[h] < n}
+
+    points = []
+    for t, target in enumerate(targets):
+        scores = PairScores(
+            names=remaining_roster,
+            index={name: i for i, name in enumerate(remaining_roster)},
+            speed=speeds[t, :n, :n].tolist(),
+            deviation=deviations[t, :n, :n].tolist(),
+        )
+        forced_ids = set(forced_main_ids)
+        bench_id = None
+        if use_bench:
+            scores = add_bench_slot(scores)
+            bench_id = scores.index[BENCH_NAME]
+            forced_ids.add(bench_id)
+
+        found = min_cost_pairing(scores.deviation, list(range(len(scores.names))), forced_ids)
+        if found is None:
+            continue
+
+        pairs = list(forced_pairs)
+        benched = None
+        for main, deputy in found[1]:
+            if main == bench_id:
+                benched = scores.names[deputy]
+            else:
+                pairs.append((scores.names[main], scores.names[deputy]))
+        points.append(SweepPoint(float(target), float(fixed_dev[t]) + found[0], pairs, benched))
+    return points
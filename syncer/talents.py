@@ -0,0 +1,126 @@
+import functools
+import time
+from bisect import bisect_left
+from typing import NamedTuple
+
+from .config import INNATE_SPEED_BONUS, MAX_TALENT_POINTS, TALENT_TREES_DEF
+from .heroes import HERO_IDS, HEROES, base_hero_name
+
+class TalentOption(NamedTuple):
+    speed: float
+    points: int
+    description: str
+
+def tree_options(tree_name, reserve=0):
+    # (points, speed, label) choices for one tree. A tree's milestones form a prerequisite chain:
+    # the milestone at N points needs the nodes before it, so N is its full cost and the speed is
+    # that of the highest milestone reached. reserve forces at least that many points into the tree.
+    milestones = TALENT_TREES_DEF.get(tree_name, {})
+    
+    def reached(points):
+        speed, label = 0.0, None
+        for cost, milestone_speed in sorted(milestones.items()):
+            if cost <= points:
+                speed, label = milestone_speed, f"{tree_name}({int(milestone_speed)}%)"
+        return speed, label
+    
+    options = []
+    for points in [reserve] + [cost for cost in milestones if cost > reserve]:
+        speed, label = reached(points)
+        options.append((points, speed, label))
+    return options
+
+def talent_speed_options(trees, budget=MAX_TALENT_POINTS, reserve=None):
+    # Knapsack over a hero's trees: every achievable talent speed with the fewest points that reach it,
+    # sorted by speed. States are (points spent, speed) so the work grows with trees x budget x
+    # distinct speeds instead of the product of every tree's options.
+    # reserve maps tree -> points that must go there for non-speed reasons (e.g. {"Pvp": 21}).
+    if reserve is None:
+        reserve = {}
+    
+    # (points, speed) -> (option index per tree, labels); the smallest index path wins ties so
+    # descriptions are stable
+    states = {(0, 0.0): ((), ())}
+    for tree_name in trees:
+        if tree_name not in TALENT_TREES_DEF:
+            continue
+        next_states = {}
+        for (points, speed), (path, labels) in states.items():
+            for j, (cost, gain, label) in enumerate(tree_options(tree_name, reserve.get(tree_name, 0))):
+                total = points + cost
+                if total > budget:
+                    continue
+                key = (total, speed + gain)
+                candidate = (path + (j,), labels + ((label,) if label else ()))
+                if key not in next_states or candidate[0] < next_states[key][0]:
+                    next_states[key] = candidate
+        states = next_states
+        
+    if not states:
+        raise ValueError(f"Reserved talent points exceed the {budget} point budget")
+    
+    # Every setup can also take the free Innate bonus
+    best = {}
+    for (points, speed), (path, labels) in states.items():
+        for innate in (False, True):
+            total_speed = speed + INNATE_SPEED_BONUS if innate else speed
+            rank = (points, path, innate)
+            if total_speed not in best or rank < best[total_speed][0]:
+                best[total_speed] = (rank, labels)
+                
+    options = []
+    for total_speed, ((points, _, innate), labels) in sorted(best.items()):
+        desc = ", ".join(labels) if labels else "No Talents"
+        if innate:
+            desc = (desc + " + Innate(6%)") if labels else "Innate(6%)"
+        options.append(TalentOption(total_speed, points, desc))
+    return options
+
+def get_achievable_talent_speeds(hero_name, reserve=None):
+    # speed -> (description, points) for a hero, {} for heroes without talents
+    hero_id = HERO_IDS.get(hero_name)
+    if hero_id is None:
+        return {}
+    return {opt.speed: (opt.description, opt.points) for opt in talent_speed_options(HEROES[hero_id].trees, reserve=reserve)}
+
+class TalentIndex:
+    # A hero's achievable talent speeds sorted ascending, with the matching descriptions and point costs
+    __slots__ = ("speeds", "descriptions", "costs")
+    
+    def __init__(self, configs):
+        ordered = sorted(configs.items())
+        self.speeds = [speed for speed, _ in ordered]
+        self.descriptions = [desc for _, (desc, _) in ordered]
+        self.costs = [cost for _, (_, cost) in ordered]
+        
+    def nearest(self, gap):
+        # Position of the speed closest to gap, O(log n). Equal distances prefer the cheaper
+        # setup, then the lower speed.
+        speeds = self.speeds
+        pos = bisect_left(speeds, gap)
+        lo = max(pos - 1, 0)
+        hi = min(pos, len(speeds) - 1)
+        d_lo = abs(speeds[lo] - gap)
+        d_hi = abs(speeds[hi] - gap)
+        if d_hi < d_lo or (d_hi == d_lo and self.costs[hi] < self.costs[lo]):
+            return hi
+        return lo
+
+# Built once at import, indexed by hero id
+_build_started = time.perf_counter()
+TALENT_INDEXES = [TalentIndex(get_achievable_talent_speeds(hero.name)) for hero in HEROES]
+# Startup cost of the above, reported with the optimizer's stats
+TALENT_INDEX_BUILD_SECONDS = time.perf_counter() - _build_started
+
+@functools.lru_cache(maxsize=None)
+def _reserved_talent_index(hero_id, reserve_items):
+    return TalentIndex(get_achievable_talent_speeds(HEROES[hero_id].name, dict(reserve_items)))
+
+def get_talent_index(hero_name, reserve=None):
+    # None for heroes without talents (the Generic fillers)
+    hero_id = HERO_IDS.get(base_hero_name(hero_name))
+    if hero_id is None:
+        return None
+    if reserve:
+        return _reserved_talent_index(hero_id, tuple(sorted(reserve.items())))
+    return TALENT_INDEXES[hero_id]
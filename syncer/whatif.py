@@ -0,0 +1,98 @@
+# Skill upgrade what-if: the best achievable score after levelling each hero's march speed skill once,
+# for every hero in one batch. The pair matrix is built once; an upgrade only re-scores the upgraded
+# hero's row and column (or its pinned march) and re-solves with the exact matching.
+from __future__ import annotations
+
+import threading
+from typing import NamedTuple, Optional
+
+from .config import BENCH_NAME, MAX_SKILL_LEVEL
+from .heroes import get_hero
+from .marches import add_bench_slot, build_pair_scores, march_deviation, march_total_speed
+from .matching import min_cost_pairing
+from .optimizer import OptimizeOptions, OptimizerState, prepare_roster
+
+class UpgradeOption(NamedTuple):
+    hero: str
+    from_level: int
+    to_level: int
+    score: float # best total deviation with the upgrade
+    gain: float # how much lower than today's best score (negative: the upgrade hurts the sync)
+
+def skill_upgrade_changes_speed(name: str, level: int, is_theia_flying: bool = False) -> bool:
+    # False when the next level adds no march speed (no skill, or Theia without flying units)
+    hero = get_hero(name)
+    return any(hero.skill_speed(level + 1, is_main, is_theia_flying) != hero.skill_speed(level, is_main, is_theia_flying) for is_main in (True, False))
+
+def upgrade_what_if(roster: list[str], levels: dict[str, int], target: float, options: Optional[OptimizeOptions] = None, state: Optional[OptimizerState] = None, cancel: Optional[threading.Event] = None) -> list[UpgradeOption]:
+    # Every one-level upgrade that changes a march speed, best score first (ties by hero name).
+    # state (optional) lends its pair score cache, so right after an optimize() call the base matrix is free.
+    # Setting cancel stops before the next re-solve, with the upgrades ranked so far.
+    # Raises ConstraintError like optimize() for impossible constraints.
+    if options is None:
+        options = OptimizeOptions()
+    bonus, flying, reserve = options.neya_artifact_bonus, options.is_theia_flying, options.talent_reserve
+
+    forced_pairs, remaining_roster, use_bench = prepare_roster(roster, options)
+    if state is not None:
+        scores = state.pair_scores.build(remaining_roster, levels, target, bonus, flying, reserve)
+    else:
+        scores = build_pair_scores(remaining_roster, levels, target, bonus, flying, reserve)
+    forced_ids = {scores.index[h] for h in options.forced_mains if h in scores.index}
+    if use_bench:
+        scores = add_bench_slot(scores)
+        forced_ids.add(scores.index[BENCH_NAME])
+    deviation = scores.deviation
+    roster_ids = list(range(len(scores.names)))
+    # Heroes whose march speeds are in the matrix (the bench row is a constant)
+    n = len(remaining_roster)
+
+    def pinned_deviation(m, d, lv):
+        return march_deviation(march_total_speed(m, d, lv, target, bonus, flying, reserve), target)
+
+    pinned = [pinned_deviation(m, d, levels) for m, d in forced_pairs]
+    fixed_dev = sum(pinned)
+    found = min_cost_pairing(deviation, roster_ids, forced_ids)
+    if found is None:
+        return []
+    baseline = fixed_dev + found[0]
+
+    upgrades = []
+    for name in roster:
+        if cancel is not None and cancel.is_set():
+            break
+        level = levels.get(name, 1)
+        if level >= MAX_SKILL_LEVEL or not skill_upgrade_changes_speed(name, level, flying):
+            continue
+        upgraded = dict(levels)
+        upgraded[name] = level + 1
+
+        if name in scores.index:
+            # Only the hero's own marches change: swap its row and column in, solve, put them back
+            i = scores.index[name]
+            saved_row = deviation[i][:n]
+            saved_col = [deviation[j][i] for j in range(n)]
+            for j in range(n):
+                if j == i:
+                    continue
+                other = scores.names[j]
+                deviation[i][j] = pinned_deviation(name, other, upgraded)
+                deviation[j][i] = pinned_deviation(other, name, upgraded)
+            try:
+                found = min_cost_pairing(deviation, roster_ids, forced_ids)
+            finally:
+                deviation[i][:n] = saved_row
+                for j in range(n):
+                    deviation[j][i] = saved_col[j]
+            if found is None:
+                continue
+            score = fixed_dev + found[0]
+        else:
+            # Pinned: the free heroes' matching is unchanged, only the hero's own march is re-scored
+            k = next(k for k, pair in enumerate(forced_pairs) if name in pair)
+            m, d = forced_pairs[k]
+            score = baseline - pinned[k] + pinned_deviation(m, d, upgraded)
+        upgrades.append(UpgradeOption(name, level, level + 1, score, baseline - score))
+
+    upgrades.sort(key=lambda u: (u.score, u.hero))
+    return upgrades
@@ -0,0 +1,53 @@
+# Batch runner and job parsing: a bad record only fails its own line.
+import io
+import json
+
+import pytest
+
+from syncer import batch, jobs
+from syncer.batch import read_records, run_batch
+from syncer.jobs import job_from_dict, run_job_dict
+
+HEROES = ["Neya", "Urag", "Emrys", "Tobin"]
+
+def run_lines(lines, workers=1):
+    stream = io.StringIO("\n".join(lines) + "\n")
+    return list(run_batch(read_records(stream, "jsonl"), workers=workers))
+
+@pytest.mark.parametrize("solver", ["exact", "branch_and_bound", "local_search"])
+def test_top_k_zero_fails_only_its_record(solver):
+    results = run_lines([
+        json.dumps({"id": "a", "heroes": HEROES}),
+        json.dumps({"id": "bad", "heroes": HEROES, "top_k": 0, "solver": solver}),
+        json.dumps({"id": "c", "heroes": HEROES}),
+    ])
+    assert [r["id"] for r in results] == ["a", "bad", "c"]
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert "top_k" in results[1]["error"]
+
+def test_out_of_range_and_malformed_fields_are_input_errors():
+    with pytest.raises(ValueError, match="min_distance"):
+        job_from_dict({"heroes": HEROES, "min_distance": -1})
+    with pytest.raises(ValueError, match="Malformed job"):
+        job_from_dict({"heroes": HEROES, "levels": ["Neya", 5]})
+    with pytest.raises(ValueError, match="lunaris_level"):
+        job_from_dict({"heroes": HEROES, "lunaris_level": 7})
+    assert run_job_dict({"id": "x", "heroes": 5})["ok"] is False
+    result = run_job_dict(["not", "a", "job"], "3")
+    assert (result["id"], result["ok"]) == ("3", False)
+
+def test_solver_bugs_are_not_reported_as_bad_input(monkeypatch):
+    def broken(*args, **kwargs):
+        raise TypeError("solver bug")
+    monkeypatch.setattr(jobs, "optimize", broken)
+    with pytest.raises(TypeError):
+        run_job_dict({"heroes": HEROES})
+    # The batch still writes a line for the record and goes on with the next one
+    result = batch._run_record(("1", {"id": "a", "heroes": HEROES}))
+    assert result == {"id": "a", "ok": False, "error": "TypeError: solver bug"}
+
+def test_unreadable_lines_keep_their_place():
+    results = run_lines([json.dumps({"id": "a", "heroes": HEROES}), "{not json", json.dumps({"heroes": HEROES, "error": "mine"})])
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["id"] == "2"
+    assert results[2]["id"] == "3"
@@ -0,0 +1,35 @@
+# Result cache: a hit has to be exactly what solving the same inputs again would give.
+from syncer import OptimizeOptions, optimize
+from syncer.cache import ResultCache, input_hash
+
+ROSTER = ["Neya", "Urag", "Emrys", "Tobin", "Forondil", "Theodore", "Seluna"]
+LEVELS = {"Neya": 5, "Urag": 3, "Emrys": 4, "Tobin": 5, "Forondil": 2, "Theodore": 5, "Seluna": 1}
+
+def plan_list(result):
+    return [(plan.score, [(m.main, m.deputy, m.talent_config) for m in plan.marches], plan.benched) for plan in result.plans]
+
+def test_order_that_changes_the_answer_changes_the_key():
+    options = OptimizeOptions()
+    assert input_hash(ROSTER, LEVELS, 50.0, options) != input_hash(ROSTER[::-1], LEVELS, 50.0, options)
+    pinned = OptimizeOptions(forced_pairs=[("Neya", "Urag"), ("Emrys", "Tobin")])
+    swapped = OptimizeOptions(forced_pairs=[("Emrys", "Tobin"), ("Neya", "Urag")])
+    assert input_hash(ROSTER, LEVELS, 50.0, pinned) != input_hash(ROSTER, LEVELS, 50.0, swapped)
+
+def test_order_that_cannot_change_the_answer_keeps_the_key():
+    a = OptimizeOptions(forced_mains={"Neya", "Urag"}, talent_reserve={"Pvp": 21, "Infantry": 0})
+    b = OptimizeOptions(forced_mains={"Urag", "Neya"}, talent_reserve={"Pvp": 21})
+    levels = dict(reversed(list(LEVELS.items())))
+    levels["Not in the roster"] = 3
+    assert input_hash(ROSTER, LEVELS, 50.0, a) == input_hash(ROSTER, levels, 50.0, b)
+
+def test_hits_match_a_fresh_solve_in_either_roster_order(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite3"))
+    options = OptimizeOptions(top_k=10)
+    for roster in (ROSTER, ROSTER[::-1]):
+        if cache.get(roster, LEVELS, 50.0, options) is None:
+            cache.put(roster, LEVELS, 50.0, options, optimize(roster, LEVELS, 50.0, options))
+    assert len(cache) == 2
+    for roster in (ROSTER, ROSTER[::-1]):
+        hit = cache.get(roster, LEVELS, 50.0, options)
+        assert hit.cached
+        assert plan_list(hit) == plan_list(optimize(roster, LEVELS, 50.0, options))
@@ -0,0 +1,43 @@
+# Diverse top K lists (min_distance > 0): branch and bound has to keep pruning and list what
+# enumeration lists.
+import random
+
+import pytest
+
+from syncer import HERO_DATABASE, OptimizeOptions, optimize
+from syncer.bench import bench_roster
+
+NAMES = [h["Name"] for h in HERO_DATABASE]
+
+def plan_list(result):
+    return [(plan.score, [(m.main, m.deputy) for m in plan.marches], plan.benched) for plan in result.plans]
+
+def marches(plan):
+    # The hero sitting out counts as one more march, with the bench
+    return [(m.main, m.deputy) for m in plan.marches] + ([("Bench", plan.benched)] if plan.benched else [])
+
+def marches_apart(a, b):
+    return len(set(a) - set(b))
+
+@pytest.mark.parametrize("min_distance", [1, 2, 4])
+def test_branch_and_bound_lists_what_enumeration_lists(min_distance):
+    rng = random.Random(min_distance)
+    for _ in range(15):
+        roster = rng.sample(NAMES, rng.randint(4, 10))
+        levels = {h: rng.randint(0, 5) for h in roster}
+        fillers = rng.randint(0, 2)
+        bnb = optimize(roster, levels, 50.0, OptimizeOptions(min_distance=min_distance, num_fillers=fillers))
+        enumerated = optimize(roster, levels, 50.0, OptimizeOptions(solver="enumerate", min_distance=min_distance, num_fillers=fillers, max_checks=10**9))
+        assert plan_list(bnb) == plan_list(enumerated)
+        # The best plan is never filtered out
+        assert bnb.plans[0].score == optimize(roster, levels, 50.0, OptimizeOptions(solver="exact", num_fillers=fillers)).plans[0].score
+        for i, a in enumerate(bnb.plans):
+            for b in bnb.plans[:i]:
+                assert marches_apart(marches(a), marches(b)) >= min_distance
+
+def test_diverse_search_keeps_pruning():
+    # 49,310 evaluations before the cutoff stopped loosening when close plans were pushed out
+    roster, levels = bench_roster(14)
+    result = optimize(roster, levels, 50.0, OptimizeOptions(min_distance=4))
+    assert result.proven_optimal
+    assert result.checked < 25000
@@ -0,0 +1,94 @@
+# Randomized cross-check of the min-cost matching solver against full enumeration.
+# Deviations mix exact ties, the 10x step above 1.5% and plain floats, like real pair matrices.
+import random
+
+import pytest
+
+from syncer import HERO_DATABASE, OptimizeOptions, optimize
+from syncer.config import BENCH_NAME
+from syncer.marches import PairScores, add_bench_slot
+from syncer.matching import min_cost_pairing
+from syncer.search import all_pairs_generator
+
+TRIALS = 150
+EPSILON = 1e-9
+
+def random_deviation(rng, n):
+    values = [0.0, 0.5, 1.0, 1.5, 15.0, 20.5, 200.0]
+    return [[0.0 if i == j else rng.choice(values + [round(rng.uniform(0, 50), 2)]) for j in range(n)] for i in range(n)]
+
+def brute_force(deviation, roster_ids, forced_mains):
+    # Best total over every matching the exhaustive generator lists, None if there is none
+    totals = [sum(deviation[m][d] for m, d in pair_list) for pair_list in all_pairs_generator(roster_ids, forced_mains)]
+    return min(totals) if totals else None
+
+def check_pairing(found, deviation, roster_ids, forced_mains):
+    total, pairs = found
+    used = [h for pair in pairs for h in pair]
+    assert sorted(used) == sorted(roster_ids)
+    assert not any(d in forced_mains for _, d in pairs)
+    assert sum(deviation[m][d] for m, d in pairs) == pytest.approx(total, abs=EPSILON)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_even_rosters_match_enumeration(seed):
+    rng = random.Random(seed)
+    for _ in range(TRIALS):
+        n = rng.choice([2, 4, 6, 8, 10])
+        deviation = random_deviation(rng, n)
+        roster_ids = list(range(n))
+        forced_mains = set(rng.sample(roster_ids, rng.randint(0, n // 2 + 1)))
+
+        expected = brute_force(deviation, roster_ids, forced_mains)
+        found = min_cost_pairing(deviation, roster_ids, forced_mains)
+        if expected is None:
+            # More forced mains than deputies left for them
+            assert found is None
+            continue
+        assert found is not None
+        check_pairing(found, deviation, roster_ids, forced_mains)
+        assert found[0] == pytest.approx(expected, abs=EPSILON)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_odd_rosters_with_bench_match_enumeration(seed):
+    rng = random.Random(100 + seed)
+    for _ in range(TRIALS):
+        n = rng.choice([3, 5, 7, 9])
+        names = [f"Hero {i}" for i in range(n)]
+        scores = PairScores(names, {name: i for i, name in enumerate(names)}, [[0.0] * n for _ in range(n)], random_deviation(rng, n))
+        scores = add_bench_slot(scores, bench_deviation=rng.choice([0.0, 5.0]))
+        roster_ids = list(range(n + 1))
+        bench_id = scores.index[BENCH_NAME]
+        forced_mains = set(rng.sample(range(n), rng.randint(0, n // 2))) | {bench_id}
+
+        expected = brute_force(scores.deviation, roster_ids, forced_mains)
+        found = min_cost_pairing(scores.deviation, roster_ids, forced_mains)
+        if expected is None:
+            assert found is None
+            continue
+        assert found is not None
+        check_pairing(found, scores.deviation, roster_ids, forced_mains)
+        assert found[0] == pytest.approx(expected, abs=EPSILON)
+        # Exactly one hero sits out, as the bench's deputy
+        assert sum(m == bench_id for m, _ in found[1]) == 1
+
+def test_exact_solver_matches_enumerate_on_real_heroes():
+    # Through optimize(): pinned pairs, Generic fillers, odd rosters and forced mains
+    rng = random.Random(7)
+    names = [h["Name"] for h in HERO_DATABASE]
+    for _ in range(40):
+        roster = rng.sample(names, rng.randint(2, 9))
+        levels = {h: rng.randint(0, 5) for h in roster}
+        forced_pairs = [(roster[0], roster[1])] if len(roster) >= 4 and rng.random() < 0.3 else []
+        forced_mains = {roster[-1]} if rng.random() < 0.3 else set()
+        common = dict(
+            num_fillers=rng.randint(0, 2),
+            forced_pairs=forced_pairs,
+            forced_mains=forced_mains,
+            neya_artifact_bonus=rng.choice([0.0, 40.0]),
+            is_theia_flying=rng.random() < 0.5,
+            max_checks=10**9,
+        )
+        target = rng.choice([45.0, 50.0, 55.5])
+        exact = optimize(roster, levels, target, OptimizeOptions(solver="exact", **common))
+        enumerated = optimize(roster, levels, target, OptimizeOptions(solver="enumerate", **common))
+        assert exact.plans[0].score == pytest.approx(enumerated.plans[0].score, abs=EPSILON)
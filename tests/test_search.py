@@ -0,0 +1,46 @@
+# Branch and bound building blocks: the bounds have to stay admissible, or pruning drops real plans.
+import random
+
+import pytest
+
+from syncer.config import BENCH_NAME
+from syncer.marches import PairScores, add_bench_slot
+from syncer.matching import min_cost_pairing
+from syncer.search import all_pairs_generator, bounded_pairs_generator, pair_lower_bounds
+
+def odd_roster_scores(rng, n):
+    names = [f"Hero {i}" for i in range(n)]
+    deviation = [[0.0 if i == j else rng.choice([0.5, 1.0, 15.0, 40.0, round(rng.uniform(0, 50), 2)]) for j in range(n)] for i in range(n)]
+    return add_bench_slot(PairScores(names, {name: i for i, name in enumerate(names)}, [[0.0] * n for _ in range(n)], deviation))
+
+def test_bench_bounds_are_admissible_and_tighter():
+    rng = random.Random(6)
+    tighter = 0
+    for _ in range(200):
+        n = rng.choice([3, 5, 7, 9])
+        scores = odd_roster_scores(rng, n)
+        bench = scores.index[BENCH_NAME]
+        roster_ids = list(range(n + 1))
+        forced = set(rng.sample(range(n), rng.randint(0, n // 2))) | {bench}
+        bounds = pair_lower_bounds(scores.deviation, roster_ids, forced, bench)
+        for m in roster_ids:
+            for d in roster_ids:
+                if m != d and d not in forced:
+                    assert scores.deviation[m][d] >= bounds[m] + bounds[d] - 1e-9
+        found = min_cost_pairing(scores.deviation, roster_ids, forced)
+        if found is not None:
+            assert sum(bounds.values()) <= found[0] + 1e-9
+            tighter += sum(bounds.values()) > sum(pair_lower_bounds(scores.deviation, roster_ids, forced).values())
+    assert tighter > 0
+
+def test_bounded_search_with_bench_finds_every_plan_under_the_cutoff():
+    rng = random.Random(60)
+    for _ in range(50):
+        n = rng.choice([5, 7, 9])
+        scores = odd_roster_scores(rng, n)
+        bench = scores.index[BENCH_NAME]
+        roster_ids = list(range(n + 1))
+        totals = sorted(sum(scores.deviation[m][d] for m, d in pairs) for pairs in all_pairs_generator(roster_ids, {bench}))
+        limit = totals[min(len(totals) - 1, 10)]
+        bounded = sorted(cost for cost, _ in bounded_pairs_generator(roster_ids, scores.deviation, lambda: limit, {bench}, bench=bench) if cost <= limit)
+        assert bounded == pytest.approx([t for t in totals if t <= limit])
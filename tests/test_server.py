@@ -0,0 +1,25 @@
+# Solver service without the HTTP layer: coalescing must never hand one job another job's answer.
+import pytest
+
+from syncer.jobs import run_job_dict
+from syncer.server import SolverService
+
+ROSTER = ["Neya", "Urag", "Emrys", "Tobin", "Forondil", "Theodore", "Seluna"]
+
+@pytest.fixture(scope="module")
+def service():
+    service = SolverService(workers=1)
+    yield service
+    service.close()
+
+def test_answers_match_solving_in_process(service):
+    for data in ({"heroes": ROSTER}, {"heroes": ROSTER[::-1]}, {"heroes": ROSTER, "forced_pairs": [["Neya", "Urag"]], "top_k": 3}):
+        status, body = service.solve({"id": "x", **data})
+        assert status == 200
+        assert body == run_job_dict({"id": "x", **data})
+
+def test_bad_input_is_a_400(service):
+    status, body = service.solve({"id": "bad", "heroes": ROSTER, "top_k": 0})
+    assert status == 400
+    assert body["ok"] is False
+    assert service.status()["invalid"] >= 1
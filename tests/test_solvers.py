@@ -0,0 +1,144 @@
+# Every solver mode against a baseline that can't be wrong: full enumeration, or the matching solver
+# where enumeration is out of reach.
+import random
+
+import pytest
+
+from syncer import HERO_DATABASE, OptimizeOptions, march_deviation, optimize, plan_synergy
+from syncer.sweep import sweep_targets
+
+NAMES = [h["Name"] for h in HERO_DATABASE]
+EPSILON = 1e-9
+TRIALS = 40
+
+def random_case(rng):
+    # Odd and even rosters, Generic fillers, pinned pairs and forced mains, Lunaris and Theia
+    roster = rng.sample(NAMES, rng.randint(2, 9))
+    levels = {h: rng.randint(0, 5) for h in roster}
+    forced_pairs = [(roster[0], roster[1])] if len(roster) >= 4 and rng.random() < 0.3 else []
+    forced_mains = {roster[-1]} if rng.random() < 0.3 else set()
+    common = dict(
+        num_fillers=rng.randint(0, 2),
+        forced_pairs=forced_pairs,
+        forced_mains=forced_mains,
+        neya_artifact_bonus=rng.choice([0.0, 40.0]),
+        is_theia_flying=rng.random() < 0.5,
+        top_k=rng.choice([1, 5, 20]),
+    )
+    return roster, levels, rng.choice([40.0, 50.0, 55.5]), common
+
+def solve(case, **options):
+    roster, levels, target, common = case
+    return optimize(roster, levels, target, OptimizeOptions(**{**common, **options}))
+
+def plan_list(result):
+    return [(plan.score, [(m.main, m.deputy, m.talent_config) for m in plan.marches], plan.benched) for plan in result.plans]
+
+def check_plans(case, result):
+    # Every plan uses each hero once and scores what its marches add up to
+    roster, levels, target, common = case
+    for plan in result.plans:
+        heroes = [h for m in plan.marches for h in (m.main, m.deputy)] + ([plan.benched] if plan.benched else [])
+        assert sorted(h for h in heroes if not h.startswith("Generic")) == sorted(roster)
+        assert not any(m.deputy in common["forced_mains"] for m in plan.marches)
+        assert plan.score == pytest.approx(sum(march_deviation(m.total_speed, target) for m in plan.marches), abs=1e-6)
+
+def cases(seed):
+    rng = random.Random(seed)
+    return [random_case(rng) for _ in range(TRIALS)]
+
+def feasible(case):
+    try:
+        return solve(case, solver="enumerate", max_checks=10**9)
+    except ValueError:
+        return None
+
+def test_branch_and_bound_lists_exactly_what_enumeration_lists():
+    # Same enumeration order with subtrees skipped, so even tied plans come out the same
+    for case in cases(1):
+        enumerated = feasible(case)
+        if enumerated is None:
+            continue
+        bnb = solve(case, solver="branch_and_bound")
+        assert bnb.proven_optimal
+        assert plan_list(bnb) == plan_list(enumerated)
+        check_plans(case, bnb)
+
+def test_exact_finds_the_enumerated_optimum():
+    for case in cases(2):
+        enumerated = feasible(case)
+        if enumerated is None:
+            continue
+        exact = solve(case, solver="exact")
+        assert exact.proven_optimal
+        assert exact.plans[0].score == pytest.approx(enumerated.plans[0].score, abs=EPSILON)
+        check_plans(case, exact)
+
+def test_anytime_given_time_lists_the_enumerated_scores():
+    # Its first answers are listed before the search runs into them, so only the scores are compared
+    for case in cases(3):
+        enumerated = feasible(case)
+        if enumerated is None:
+            continue
+        anytime = solve(case, solver="anytime", time_budget=60.0)
+        assert anytime.proven_optimal
+        assert [p.score for p in anytime.plans] == pytest.approx([p.score for p in enumerated.plans], abs=EPSILON)
+        check_plans(case, anytime)
+
+def test_local_search_on_small_rosters():
+    for case in cases(4):
+        enumerated = feasible(case)
+        if enumerated is None:
+            continue
+        local = solve(case, solver="local_search", time_budget=0.05)
+        assert local.plans[0].score == pytest.approx(enumerated.plans[0].score, abs=EPSILON)
+        assert len({tuple(plan) for _, plan, _ in plan_list(local)}) == len(local.plans)
+        check_plans(case, local)
+
+def test_pareto_front_matches_brute_force():
+    for case in cases(5):
+        roster, levels, target, common = case
+        if len(roster) + common["num_fillers"] > 8:
+            continue
+        everything = feasible((roster, levels, target, {**common, "top_k": 10**6}))
+        if everything is None:
+            continue
+        # Best deviation per synergy total, then only the totals no higher total beats
+        best = {}
+        for plan in everything.plans:
+            synergy = plan_synergy(plan.marches)
+            best[synergy] = min(best.get(synergy, float("inf")), plan.score)
+        front = [(best[s], s) for s in sorted(best) if all(best[t] > best[s] + EPSILON for t in best if t > s)]
+        pareto = solve(case, solver="pareto")
+        assert pareto.proven_optimal
+        assert [(p.score, plan_synergy(p.marches)) for p in pareto.plans] == pytest.approx(front, abs=1e-6)
+        check_plans(case, pareto)
+
+def test_sweep_matches_exact_at_every_target():
+    for roster, levels, _, common in cases(6)[:15]:
+        options = OptimizeOptions(**common)
+        try:
+            points = sweep_targets(roster, levels, [35.0, 47.5, 50.0, 62.0], options)
+        except ValueError:
+            continue
+        for point in points:
+            exact = optimize(roster, levels, point.target, OptimizeOptions(**{**common, "solver": "exact"}))
+            assert point.score == pytest.approx(exact.plans[0].score, abs=1e-6)
+
+def pooled_roster(rng, n):
+    # Pooled alliance roster: the same hero can come from several players
+    roster = [f"{rng.choice(NAMES)}@P{i}" for i in range(n)]
+    return roster, {h: rng.randint(1, 5) for h in roster}
+
+@pytest.mark.parametrize("heroes", [31, 120, 161])
+def test_local_search_lists_the_exact_optimum_first(heroes):
+    rng = random.Random(heroes)
+    roster, levels = pooled_roster(rng, heroes)
+    forced_mains = set(rng.sample(roster, 5))
+    result = optimize(roster, levels, 50.0, OptimizeOptions(solver="local_search", forced_mains=forced_mains, time_budget=0.2))
+    exact = optimize(roster, levels, 50.0, OptimizeOptions(solver="exact", forced_mains=forced_mains))
+    assert result.plans[0].score == pytest.approx(exact.plans[0].score, abs=EPSILON)
+    assert result.lower_bound == pytest.approx(exact.plans[0].score, abs=EPSILON)
+    assert not result.proven_optimal
+    scores = [plan.score for plan in result.plans]
+    assert scores == sorted(scores)
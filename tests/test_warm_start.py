@@ -0,0 +1,54 @@
+# Incremental re-optimization: a warm OptimizerState may only make a search faster, never change its answer.
+import random
+
+import pytest
+
+from syncer import HERO_DATABASE, OptimizeOptions, OptimizerState, optimize
+from syncer.cache import ResultCache
+
+NAMES = [h["Name"] for h in HERO_DATABASE]
+
+def plan_list(result):
+    return [(plan.score, [(m.main, m.deputy, m.talent_config) for m in plan.marches], plan.benched) for plan in result.plans]
+
+def random_case(rng):
+    roster = rng.sample(NAMES, rng.randint(4, 11))
+    levels = {h: rng.randint(0, 5) for h in roster}
+    return roster, levels, rng.choice([45.0, 50.0, 55.0])
+
+@pytest.mark.parametrize("solver", ["branch_and_bound", "anytime"])
+def test_warm_and_cold_complete_runs_list_the_same_plans(solver):
+    rng = random.Random(17)
+    warm_runs = 0
+    for _ in range(60):
+        roster, levels, target = random_case(rng)
+        # Generous budget: the anytime solver has to finish for the comparison to mean anything
+        options = OptimizeOptions(solver=solver, num_fillers=rng.randint(0, 1), top_k=rng.choice([3, 20]), time_budget=60.0 if solver == "anytime" else None)
+        state = OptimizerState()
+        # Some history first: the same roster with one hero's level or the target changed
+        tweaked = dict(levels)
+        tweaked[rng.choice(roster)] = rng.randint(0, 5)
+        optimize(roster, tweaked, target + rng.choice([0.0, 1.0]), options, state=state)
+
+        warm = optimize(roster, levels, target, options, state=state)
+        cold = optimize(roster, levels, target, options)
+        assert warm.proven_optimal and cold.proven_optimal
+        assert plan_list(warm) == plan_list(cold)
+        assert warm.checked <= cold.checked
+        warm_runs += warm.warm_started
+    assert warm_runs > 0
+
+def test_cache_serves_the_cold_answer_after_a_warm_run(tmp_path):
+    rng = random.Random(3)
+    for _ in range(10):
+        roster, levels, target = random_case(rng)
+        options = OptimizeOptions(top_k=5)
+        state = OptimizerState()
+        optimize(roster, levels, target + 1.0, options, state=state)
+
+        cache = ResultCache(str(tmp_path / "results.sqlite3"))
+        cache.clear()
+        cache.put(roster, levels, target, options, optimize(roster, levels, target, options, state=state))
+        cached = cache.get(roster, levels, target, options)
+        assert cached is not None
+        assert plan_list(cached) == plan_list(optimize(roster, levels, target, options))
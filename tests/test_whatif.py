@@ -0,0 +1,35 @@
+# Skill upgrade what-if: each ranked score must be what re-optimizing with that one level raised gives.
+import random
+import threading
+
+import pytest
+
+from syncer import HERO_DATABASE, OptimizeOptions, optimize, upgrade_what_if
+from syncer.background import UpgradeJob
+
+NAMES = [h["Name"] for h in HERO_DATABASE]
+
+def test_scores_match_re_optimizing():
+    rng = random.Random(23)
+    for _ in range(25):
+        roster = rng.sample(NAMES, rng.randint(3, 9))
+        levels = {h: rng.randint(0, 4) for h in roster}
+        forced_pairs = [(roster[0], roster[1])] if len(roster) >= 4 and rng.random() < 0.4 else []
+        options = OptimizeOptions(solver="exact", forced_pairs=forced_pairs, num_fillers=rng.randint(0, 1), is_theia_flying=rng.random() < 0.5)
+        upgrades = upgrade_what_if(roster, levels, 50.0, options)
+        assert [(u.score, u.hero) for u in upgrades] == sorted((u.score, u.hero) for u in upgrades)
+        for u in upgrades:
+            upgraded = {**levels, u.hero: u.to_level}
+            assert u.score == pytest.approx(optimize(roster, upgraded, 50.0, options).plans[0].score, abs=1e-9)
+
+def test_background_job_and_cancel():
+    roster = NAMES[:10]
+    levels = {h: 2 for h in roster}
+    job = UpgradeJob(roster, levels, 50.0, OptimizeOptions())
+    assert job.wait(30)
+    assert job.error is None
+    assert job.upgrades == upgrade_what_if(roster, levels, 50.0, OptimizeOptions())
+
+    cancel = threading.Event()
+    cancel.set()
+    assert upgrade_what_if(roster, levels, 50.0, cancel=cancel) == []